@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+'''
+Generates synthetic (but realistic) Bitpanda CSV export
+
+Usage: python benchmarks/generate.py ROWS [--output FILE] [--years N] [--seed N]
+'''
+
+import sys
+import math
+import heapq
+import random
+import itertools
+import argparse
+from datetime import datetime, timedelta
+
+
+# Define globally ..
+# (1) .. columns (as exported by Bitpanda)
+columns = [
+    'Transaction ID', 'Timestamp', 'Transaction Type', 'In/Out', 'Amount Fiat', 'Fiat',
+    'Amount Asset', 'Asset', 'Asset market price', 'Asset market price currency',
+    'Asset class', 'Product ID', 'Fee', 'Fee asset', 'Spread', 'Spread Currency',
+]
+
+# (2) .. assets (class, product ID, initial price, daily volatility)
+assets = {
+    'BTC': ('Cryptocurrency', 1, 8000.00, 0.03),
+    'ETH': ('Cryptocurrency', 5, 200.00, 0.035),
+    'ADA': ('Cryptocurrency', 27, 0.05, 0.04),
+    'BEST': ('Cryptocurrency', 33, 0.10, 0.04),
+    'XAU': ('Metal', 28, 1500.00, 0.008),
+    'XAG': ('Metal', 29, 15.00, 0.012),
+    'AAPL': ('Stock (derivative)', 120, 150.00, 0.015),
+    'MSFT': ('Stock (derivative)', 121, 200.00, 0.015),
+    'TSLA': ('Stock (derivative)', 122, 400.00, 0.03),
+}
+
+# (3) .. share of rows (by origin)
+shares = {
+    'plan': 0.4,
+    'deposit': 0.1,
+    'trade': 0.5,
+}
+
+# (4) .. random trades (with relative weights)
+trades = {
+    'buy': 40,
+    'sell': 30,
+    'transfer': 10,
+    'reward': 10,
+    'withdrawal': 5,
+    'fiat_withdrawal': 5,
+}
+
+# (5) .. savings plan cadences (in days) & amounts (in €)
+cadences = [7, 14, 30]
+plan_amounts = [25.00, 50.00, 100.00, 250.00]
+
+
+class Generator:
+    '''Emits transactions in chronological order, keeping track of prices & holdings'''
+
+    def __init__(self, rows: int, years: float = 5, seed: int = 1, start: datetime = datetime(2018, 1, 1)) -> None:
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.start = start
+        self.end = start + timedelta(days=365 * years)
+
+        # Set initial prices & holdings
+        self.prices = {asset: price for asset, (_, _, price, _) in assets.items()}
+        self.day = start.date()
+        self.holdings = dict.fromkeys(assets.keys(), 0.0)
+
+        # Determine number of savings plans & depositors (so that rows are shared as intended)
+        days = (self.end - self.start).days
+        plans = max(1, math.ceil(rows * shares['plan'] / (days * sum(1 / cadence for cadence in cadences) / len(cadences))))
+        depositors = max(1, math.ceil(rows * shares['deposit'] / (days / 30)))
+
+        # Schedule first events
+        self.events = []
+        self.counter = itertools.count()
+
+        for index in range(plans):
+            cadence = self.random.choice(cadences)
+            plan = (self.random.choice(list(assets.keys())), self.random.choice(plan_amounts), cadence)
+            self.schedule(start + timedelta(days=self.random.uniform(0, cadence)), 'plan', plan)
+
+        for index in range(depositors):
+            self.schedule(start + timedelta(days=self.random.uniform(0, 30)), 'deposit', round(self.random.uniform(500, 5000), 2))
+
+        # Determine mean interval between random trades
+        self.trade_interval = days * 86400 / max(1, rows * shares['trade'])
+        self.schedule(start, 'trade', None)
+
+
+    def schedule(self, time: datetime, origin: str, payload) -> None:
+        # Add counter, so that equal times don't compare payloads
+        heapq.heappush(self.events, (time, next(self.counter), origin, payload))
+
+
+    def get_id(self) -> str:
+        value = '{:032x}'.format(self.random.getrandbits(128))
+
+        return '{}-{}-{}-{}-{}'.format(value[:8], value[8:12], value[12:16], value[16:20], value[20:])
+
+
+    def get_price(self, asset: str, time: datetime) -> float:
+        # Move prices (once per day, as random walk)
+        while self.day < time.date():
+            self.day += timedelta(days=1)
+
+            for name, (_, _, _, volatility) in assets.items():
+                self.prices[name] *= math.exp(self.random.gauss(0, volatility))
+
+        return self.prices[asset]
+
+
+    def format_price(self, price: float) -> str:
+        return '{:.2f}'.format(price) if price >= 1 else '{:.4f}'.format(price)
+
+
+    def fiat_row(self, time: datetime, kind: str, amount: float) -> list:
+        return [
+            self.get_id(), time.strftime('%Y-%m-%dT%H:%M:%S+01:00'), kind, 'incoming' if kind == 'deposit' else 'outgoing',
+            '{:.2f}'.format(amount), 'EUR', '-', 'EUR', '-', 'EUR', 'Fiat', '-', '0.00', 'EUR', '-', '-',
+        ]
+
+
+    def asset_row(self, time: datetime, kind: str, asset: str, amount: float = None, quantity: float = None, fee: float = None) -> list:
+        asset_class, product_id, _, _ = assets[asset]
+        price = self.get_price(asset, time)
+
+        # Determine quantity (or amount)
+        if quantity is None:
+            quantity = amount / price
+
+        if amount is None:
+            amount = quantity * price
+
+        # Keep track of holdings (fees being charged in asset itself)
+        self.holdings[asset] += quantity if kind in ['buy', 'transfer'] else -quantity
+
+        if fee is not None:
+            self.holdings[asset] -= fee
+
+        return [
+            self.get_id(), time.strftime('%Y-%m-%dT%H:%M:%S+01:00'), kind, 'outgoing' if kind in ['buy', 'withdrawal'] else 'incoming',
+            '0.00' if kind == 'transfer' else '{:.2f}'.format(amount), 'EUR', '{:.8f}'.format(quantity), asset, self.format_price(price), 'EUR',
+            asset_class, str(product_id), '-' if fee is None else '{:.8f}'.format(fee), '-' if fee is None else asset, '-', '-',
+        ]
+
+
+    def trade(self, time: datetime) -> list:
+        kind = self.random.choices(list(trades.keys()), list(trades.values()))[0]
+        asset = self.random.choice([name for name in assets.keys() if name != 'BEST'])
+
+        # Sell (or withdraw) part of holdings (buying instead, if there are none)
+        if kind in ['sell', 'withdrawal']:
+            if self.holdings[asset] > 0:
+                quantity = self.holdings[asset] * self.random.uniform(0.1, 0.9)
+
+                if kind == 'sell':
+                    return self.asset_row(time, 'sell', asset, quantity=quantity)
+
+                return self.asset_row(time, 'withdrawal', asset, quantity=quantity * 0.99, fee=quantity * 0.01)
+
+            kind = 'buy'
+
+        if kind == 'buy':
+            return self.asset_row(time, 'buy', asset, amount=round(self.random.uniform(10, 2000), 2))
+
+        # Receive assets from other wallets ..
+        if kind == 'transfer':
+            return self.asset_row(time, 'transfer', asset, amount=self.random.uniform(10, 500))
+
+        # .. or rewards (paid in BEST)
+        if kind == 'reward':
+            return self.asset_row(time, 'transfer', 'BEST', amount=self.random.uniform(0.5, 20))
+
+        return self.fiat_row(time, 'withdrawal', round(self.random.uniform(100, 2000), 2))
+
+
+    def __iter__(self):
+        for _ in range(self.rows):
+            time, _, origin, payload = heapq.heappop(self.events)
+
+            # Savings plans buy same amount at fixed cadence ..
+            if origin == 'plan':
+                asset, amount, cadence = payload
+                yield self.asset_row(time, 'buy', asset, amount=amount)
+                self.schedule(time + timedelta(days=cadence), origin, payload)
+
+            # .. while salaries are deposited monthly ..
+            elif origin == 'deposit':
+                yield self.fiat_row(time, 'deposit', payload)
+                self.schedule(time + timedelta(days=30), origin, payload)
+
+            # .. and other trades happen at random
+            else:
+                yield self.trade(time)
+                self.schedule(time + timedelta(seconds=self.random.expovariate(1 / self.trade_interval)), origin, payload)
+
+
+def generate(rows: int, output_file: str, years: float = 5, seed: int = 1) -> None:
+    '''Writes synthetic export with given number of rows'''
+
+    generator = Generator(rows, years, seed)
+
+    with open(output_file, 'w', newline='') as file:
+        # Write preamble (same as Bitpanda)
+        file.write('"Disclaimer: All data is without guarantee, errors and changes are reserved."\n')
+        file.write('"Name:","Max Mustermann"\n')
+        file.write('"Address:","Musterstraße 11"\n')
+        file.write('"Created at:","{}"\n'.format(generator.end.strftime('%Y-%m-%d')))
+        file.write('"Period:","{} - {}"\n'.format(generator.start.strftime('%Y-%m-%d'), generator.end.strftime('%Y-%m-%d')))
+        file.write('\n')
+        file.write(','.join(columns) + '\n')
+
+        for row in generator:
+            file.write(','.join(row) + '\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Generates synthetic Bitpanda CSV export')
+    parser.add_argument('rows', type=int, help='Number of transactions (eg 1000 to 10000000)')
+    parser.add_argument('-o', '--output', default='export.csv', help='Output file')
+    parser.add_argument('-y', '--years', type=float, default=5, help='Period covered by export')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+
+    generate(args.rows, args.output, args.years, args.seed)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+'''
+Times & memory-profiles each pipeline stage across export sizes
+
+Usage: python benchmarks/pipeline.py [--sizes 1000,10000,100000] [--pdf-max N] [--engine NAME] [--tracemalloc]
+'''
+
+import os
+import sys
+import json
+import math
+import argparse
+import tempfile
+import subprocess
+
+from generate import generate
+
+
+# Define globally ..
+# (1) .. repository root
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (2) .. code running pipeline (in fresh process, so peak RSS isn't shared between sizes)
+run_code = '''
+import sys
+import tracemalloc
+
+from src.tax.report import Report
+from src.tax.metrics import Metrics
+from src.profiler import Profiler
+
+input_file, output_file, metrics_file, file_format, engine, trace = sys.argv[1:]
+
+obj = Report([input_file])
+obj.engine = engine or None
+
+# Measure allocations per stage (if enabled)
+if trace == '1':
+    tracemalloc.start()
+    obj.metrics = Profiler()
+
+else:
+    obj.metrics = Metrics()
+
+obj.render(output_file, file_format=file_format)
+obj.metrics.dump(metrics_file)
+'''
+
+# (3) .. stages (in pipeline order, with PDF sections being summed up)
+stages = [
+    'ingestion',
+    'extract_assets',
+    'process_transactions',
+    'calculate_margins',
+    'sections',
+    'export (pdf)',
+    'export (json)',
+]
+
+
+def run_pipeline(input_file: str, temp_dir: str, file_format: str, engine: str = None, trace: bool = False) -> dict:
+    metrics_file = os.path.join(temp_dir, 'metrics.jsonl')
+
+    if os.path.exists(metrics_file):
+        os.remove(metrics_file)
+
+    args = [input_file, os.path.join(temp_dir, 'report'), metrics_file, file_format, engine or '', '1' if trace else '0']
+    result = subprocess.run([sys.executable, '-c', run_code] + args, cwd=root, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise Exception('Pipeline failed: {}'.format(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode))
+
+    # Combine records (per stage)
+    totals = {}
+
+    with open(metrics_file) as file:
+        for line in file:
+            record = json.loads(line)
+
+            # Sum up sections rendered one after another (as `add_*_pages`) ..
+            stage = 'sections' if record['stage'].startswith('add_') else record['stage']
+
+            # .. and tell exports apart (as PDF & JSON don't scale alike)
+            if stage == 'export':
+                stage = 'export ({})'.format(record['format'])
+
+            if stage not in totals:
+                totals[stage] = {'wall': 0.0, 'cpu': 0.0, 'peak_rss': 0, 'peak_allocated': 0}
+
+            total = totals[stage]
+            total['wall'] += record['wall']
+            total['cpu'] += record['cpu']
+            total['peak_rss'] = max(total['peak_rss'], record['peak_rss'] or 0)
+            total['peak_allocated'] = max(total['peak_allocated'], record.get('peak_allocated', 0))
+
+    return totals
+
+
+def get_exponent(sizes: list, timings: list):
+    '''Estimates scaling exponent between two largest sizes (1 = linear, 2 = quadratic)'''
+
+    # Skip timings too small to be meaningful
+    points = [(size, timing) for size, timing in zip(sizes, timings) if timing is not None and timing >= 0.05]
+
+    if len(points) < 2:
+        return None
+
+    (size1, timing1), (size2, timing2) = points[-2:]
+
+    return math.log(timing2 / timing1) / math.log(size2 / size1)
+
+
+def format_size(size: int) -> str:
+    for factor, suffix in [(1000000, 'M'), (1000, 'k')]:
+        if size >= factor and size % factor == 0:
+            return '{}{}'.format(size // factor, suffix)
+
+    return str(size)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Times & memory-profiles each pipeline stage across export sizes')
+    parser.add_argument('-s', '--sizes', default='1000,10000,100000', help='Comma-separated row counts (eg 1000,10000,100000,1000000,10000000)')
+    parser.add_argument('-p', '--pdf-max', type=int, default=100000, help='Largest size rendered as PDF (larger ones being exported as JSON)')
+    parser.add_argument('-e', '--engine', help='CSV engine (eg "csv", "mmap" or "pandas")')
+    parser.add_argument('-t', '--tracemalloc', action='store_true', help='Measure Python allocations per stage (slow)')
+    parser.add_argument('-x', '--max-exponent', type=float, default=1.3, help='Fail if any stage scales worse than this')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (for generated exports)')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    # Create data array
+    results = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            input_file = os.path.join(temp_dir, 'export-{}.csv'.format(size))
+            generate(size, input_file, seed=args.seed)
+
+            file_format = 'pdf' if size <= args.pdf_max else 'json'
+            results[size] = run_pipeline(input_file, temp_dir, file_format, args.engine, args.tracemalloc)
+
+            # Remove export (as large ones take up gigabytes)
+            os.remove(input_file)
+
+            print('{:>6} rows done ({})'.format(format_size(size), file_format), file=sys.stderr)
+
+    # Print wall time (& peak RSS) per stage & size
+    header = '{:<22}'.format('stage') + ''.join('{:>18}'.format(format_size(size)) for size in sizes) + '{:>10}'.format('exponent')
+    print(header)
+    print('-' * len(header))
+
+    # Keep track of stages scaling worse than expected
+    failures = []
+
+    for stage in stages:
+        timings = [results[size][stage]['wall'] if stage in results[size] else None for size in sizes]
+
+        if not any(timing is not None for timing in timings):
+            continue
+
+        cells = []
+
+        for size, timing in zip(sizes, timings):
+            if timing is None:
+                cells.append('{:>18}'.format('-'))
+                continue
+
+            total = results[size][stage]
+            memory = total['peak_allocated'] if args.tracemalloc else total['peak_rss']
+            cells.append('{:>9.3f}s {:>6.0f}MB'.format(timing, memory / 1024 / 1024))
+
+        exponent = get_exponent(sizes, timings)
+        status = ''
+
+        if exponent is not None and exponent > args.max_exponent:
+            status = ' SUPERLINEAR'
+            failures.append(stage)
+
+        print('{:<22}'.format(stage) + ''.join(cells) + '{:>10}'.format('-' if exponent is None else '{:.2f}'.format(exponent)) + status)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+'''
+Measures CLI startup time against budget
+
+Usage: python benchmarks/startup.py [--runs N] [--importtime]
+'''
+
+import os
+import sys
+import json
+import argparse
+import textwrap
+import tempfile
+import statistics
+import subprocess
+import time
+
+
+# Define globally ..
+# (1) .. repository root
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (2) .. minimal CSV export
+csv_data = '''"Disclaimer: All data is without guarantee, errors and changes are reserved."
+
+Transaction ID,Timestamp,Transaction Type,In/Out,Amount Fiat,Fiat,Amount Asset,Asset,Asset market price,Asset market price currency,Asset class,Product ID,Fee,Fee asset,Spread,Spread Currency
+D1,2021-01-02T10:00:00+01:00,deposit,incoming,1000.00,EUR,-,EUR,-,EUR,Fiat,-,0.00,EUR,-,-
+T1,2021-02-01T10:00:00+01:00,buy,outgoing,500.00,EUR,0.01,BTC,50000.00,EUR,Cryptocurrency,1,-,-,-,-
+'''
+
+# (3) .. startup budgets (in milliseconds)
+budgets = {
+    # Printing help must not import any heavy dependency
+    'help': 150,
+
+    # Connecting imports `httpx` (but neither `pandas` nor `fpdf`), measured by invoking command (with stubbed API calls)
+    'connect': 400,
+
+    # Creating (non-PDF) report imports `pandas` (but neither `fpdf` nor `matplotlib`)
+    'report': 1500,
+}
+
+# (4) .. heavy dependencies (per scenario) that must not be imported (see budgets)
+forbidden_modules = {
+    'help': ['pandas', 'fpdf', 'matplotlib'],
+    'connect': ['pandas', 'fpdf', 'matplotlib'],
+    'report': ['fpdf', 'matplotlib'],
+}
+
+# (5) .. code reporting imported heavy dependencies (as last line of output, even if scenario exits)
+report_modules = '''
+finally:
+    print('modules:', json.dumps(sorted(m for m in ('pandas', 'fpdf', 'matplotlib') if m in sys.modules)))
+'''
+
+
+def get_scenarios(temp_dir: str) -> dict:
+    # Store CSV export
+    input_file = os.path.join(temp_dir, 'export.csv')
+
+    with open(input_file, 'w') as file:
+        file.write(csv_data)
+
+    return {
+        'help': 'from src.cli import cli; cli(["--help"])',
+        'connect': textwrap.dedent('''
+            from unittest import mock
+            from src.cli import cli
+
+            with mock.patch('src.api.bitpanda.Bitpanda.get_report', return_value={{}}):
+                cli(["connect", "-k", "key", "-o", "{}"])
+        ''').format(os.path.join(temp_dir, 'connect')),
+        'report': 'from src.cli import cli; cli(["report", "{}", "-f", "json", "-o", "{}"])'.format(input_file, os.path.join(temp_dir, 'report')),
+    }
+
+
+def wrap(code: str) -> str:
+    '''Wraps scenario, so that it reports imported heavy dependencies'''
+
+    return 'import sys, json\ntry:\n{}{}'.format(textwrap.indent(code.strip(), '    ') + '\n', report_modules)
+
+
+def measure(code: str, runs: int, forbidden: list = None) -> list:
+    # Create data array
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', wrap(code)], cwd=root, capture_output=True, text=True)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        # Make sure scenario succeeded (as timing failures is pointless) ..
+        if result.returncode != 0:
+            raise Exception('Scenario failed (exit code {}):\n{}'.format(result.returncode, result.stderr.strip()))
+
+        # .. without importing heavy dependencies
+        lines = [line for line in result.stdout.splitlines() if line.startswith('modules: ')]
+
+        if not lines:
+            raise Exception('Scenario did not report imported modules')
+
+        modules = set(json.loads(lines[-1][len('modules: '):]))
+
+        if modules & set(forbidden or []):
+            raise Exception('Scenario imported {}'.format(', '.join(sorted(modules & set(forbidden)))))
+
+    return timings
+
+
+def print_importtime(code: str, limit: int = 10) -> None:
+    # Run with import profiling enabled
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=root, capture_output=True, text=True)
+
+    # Parse 'import time: self | cumulative | module' lines
+    modules = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        _, self_time, cumulative, module = [part.strip() for part in line.replace('import time:', '|').split('|')]
+        modules.append((int(cumulative), int(self_time), module))
+
+    for cumulative, self_time, module in sorted(modules, reverse=True)[:limit]:
+        print('    {:>8.1f} ms {:>8.1f} ms  {}'.format(cumulative / 1000, self_time / 1000, module))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Measures CLI startup time against budget')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='Number of runs per scenario')
+    parser.add_argument('-i', '--importtime', action='store_true', help='Show slowest imports per scenario')
+    args = parser.parse_args()
+
+    # Keep track of exceeded budgets
+    failures = []
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, code in get_scenarios(temp_dir).items():
+            try:
+                timings = measure(code, args.runs, forbidden_modules[name])
+
+            except Exception as e:
+                print('{:<8} FAILED  {}'.format(name, e))
+                failures.append(name)
+
+                continue
+
+            median = statistics.median(timings)
+
+            status = 'ok' if median <= budgets[name] else 'OVER BUDGET'
+
+            print('{:<8} median {:>7.1f} ms  min {:>7.1f} ms  budget {:>5} ms  {}'.format(name, median, min(timings), budgets[name], status))
+
+            if args.importtime:
+                print_importtime(code)
+
+            if median > budgets[name]:
+                failures.append(name)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -33,10 +33,15 @@ setuptools.setup(
         'httpx',
         'fpdf2',
         'matplotlib',
-        'pandas',
+        'pypdf>=4.3',
         'pypng',
         'pyqrcode',
         'pyyaml',
     ],
+    extras_require={
+        'pandas': ['pandas'],
+        'xlsx': ['openpyxl'],
+        'json': ['orjson'],
+    },
     python_requires='>=3.7',
 )
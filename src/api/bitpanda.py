@@ -3,6 +3,8 @@ import functools
 
 import httpx
 
+from ..tax.records import make_record
+
 
 class Bitpanda:
     """
@@ -12,6 +14,10 @@ class Bitpanda:
     page_size = 200
 
 
+    # Precious metals (by symbol), any other coin being cryptocurrency
+    metals = ['XAU', 'XAG', 'XPT', 'XPD']
+
+
     def __init__(self, api_key: str = ''):
         self.api_key = api_key
 
@@ -35,33 +41,38 @@ class Bitpanda:
         return response.json()
 
 
-    async def get_trades(self) -> list:
+    async def iter_pages(self, path: str):
         """
-        Get all trades made by the user, sorted by date.
+        Iterate over pages of a paginated endpoint, yielding their items as soon as each page arrives.
         """
 
-        trades = []
-        has_more = True
+        url = '{}?page=1&page_size={}'.format(path, self.page_size)
 
-        path = 'trades?page=1&page_size={}'.format(self.page_size)
+        while url:
+            result = await self.make_request(url)
 
-        try:
-            while has_more:
-                result = await self.make_request(path)
-                trades += [trade['attributes'] for trade in result['data']]
+            yield [dict(item['attributes'], id=item['id']) for item in result['data']]
 
-                # Keep fetching trades while there are more pages on the result.
-                if 'links' in result and 'next' in result['links']:
-                    path = 'trades{}'.format(result['links']['next'])
+            # Keep fetching while there are more pages on the result.
+            if 'links' in result and 'next' in result['links']:
+                url = '{}{}'.format(path, result['links']['next'])
 
-                else:
-                    has_more = False
+            else:
+                url = None
 
-            # Sort trades (by timestamp)
-            trades.sort(key=lambda d: d['time']['unix'])
 
-        except:
-            raise
+    async def get_trades(self) -> list:
+        """
+        Get all trades made by the user, sorted by date.
+        """
+
+        trades = []
+
+        async for page in self.iter_pages('trades'):
+            trades += page
+
+        # Sort trades (by timestamp)
+        trades.sort(key=lambda d: d['time']['unix'])
 
         return trades
 
@@ -72,26 +83,11 @@ class Bitpanda:
         """
 
         transactions = []
-        has_more = True
-
-        path = 'fiatwallets/transactions?page=1&page_size={}'.format(self.page_size)
 
-        try:
-            while has_more:
-                result = await self.make_request(path)
-                transactions += [transaction['attributes'] for transaction in result['data']]
-
-                # Keep fetching transactions while there are more pages on the result.
-                if 'links' in result and 'next' in result['links']:
-                    path = 'fiatwallets/transactions{}'.format(result['links']['next'])
-
-                else:
-                    has_more = False
+        async for page in self.iter_pages('fiatwallets/transactions'):
+            transactions += page
 
-            transactions.sort(key=lambda d: d['time']['unix'])
-
-        except:
-            raise
+        transactions.sort(key=lambda d: d['time']['unix'])
 
         return transactions
 
@@ -146,6 +142,136 @@ class Bitpanda:
         }
 
 
+    async def fetch_transactions(self) -> dict:
+        wallets, fiat_wallets, trades, fiat_transactions = await asyncio.gather(
+            self.get_wallets(),
+            self.get_fiat_wallets(),
+            self.get_trades(),
+            self.get_fiat_transactions(),
+        )
+
+        return {
+            'wallets': wallets,
+            'fiat_wallets': fiat_wallets,
+            'trades': trades,
+            'fiat_transactions': fiat_transactions,
+        }
+
+
+    def get_records(self) -> list:
+        """
+        Get all finished trades and fiat transactions as normalized records (same as CSV export), sorted by date.
+        """
+
+        return self.to_records(asyncio.run(self.fetch_transactions()))
+
+
+    def get_symbols(self, wallets: list, fiat_wallets: list) -> tuple:
+        """
+        Determine symbols of coins and fiat currencies (by ID).
+        """
+
+        return (
+            {w['cryptocoin_id']: w['cryptocoin_symbol'] for w in wallets},
+            {fw['fiat_id']: fw['fiat_symbol'] for fw in fiat_wallets},
+        )
+
+
+    def trade_to_record(self, t: dict, coins: dict, fiats: dict) -> dict:
+        """
+        Convert finished trade into normalized record (purchase or sale of its asset), otherwise None.
+        """
+
+        if t['status'] != 'finished' or t['type'] not in ['buy', 'sell']:
+            return None
+
+        symbol = t.get('cryptocoin_symbol') or coins.get(t['cryptocoin_id'], 'UNKNOWN')
+        fiat = fiats.get(t['fiat_id'], 'EUR')
+
+        # Same as CSV export, direction refers to fiat (which leaves account when buying)
+        direction = 'outgoing' if t['type'] == 'buy' else 'incoming'
+
+        return make_record(
+            t['id'],
+            t['time']['date_iso8601'],
+            t['type'],
+            direction,
+            symbol,
+            'Metal' if symbol in self.metals else 'Cryptocurrency',
+            t['amount_fiat'],
+            fiat,
+            t['amount_cryptocoin'],
+            t['price'],
+            t['cryptocoin_id'],
+        )
+
+
+    def fiat_transaction_to_record(self, t: dict, fiats: dict) -> dict:
+        """
+        Convert finished fiat transaction into normalized record (skipping those belonging to trades), otherwise None.
+        """
+
+        if t['status'] != 'finished' or t['type'] not in ['deposit', 'withdrawal', 'transfer']:
+            return None
+
+        fiat = fiats.get(t['fiat_id'], 'EUR')
+
+        return make_record(
+            t['id'],
+            t['time']['date_iso8601'],
+            t['type'],
+            t.get('in_or_out') or ('outgoing' if t['type'] == 'withdrawal' else 'incoming'),
+            fiat,
+            'Fiat',
+            t['amount'],
+            fiat,
+            fee=t.get('fee') or '-',
+            fee_asset=fiat,
+        )
+
+
+    def to_records(self, data: dict) -> list:
+        """
+        Convert trades and fiat transactions into normalized records, sorted by date.
+        """
+
+        coins, fiats = self.get_symbols(data['wallets'], data['fiat_wallets'])
+
+        records = [(t['time']['unix'], self.trade_to_record(t, coins, fiats)) for t in data['trades']]
+        records += [(t['time']['unix'], self.fiat_transaction_to_record(t, fiats)) for t in data['fiat_transactions']]
+
+        # Sort records (by date)
+        records.sort(key=lambda d: int(d[0]))
+
+        return [record for _, record in records if record is not None]
+
+
+    async def iter_records(self):
+        """
+        Iterate over trades and fiat transactions as normalized records, yielding them page by page (in order of arrival).
+        """
+
+        coins, fiats = self.get_symbols(await self.get_wallets(), await self.get_fiat_wallets())
+
+        async for page in self.iter_pages('trades'):
+            yield [record for record in (self.trade_to_record(t, coins, fiats) for t in page) if record is not None]
+
+        async for page in self.iter_pages('fiatwallets/transactions'):
+            yield [record for record in (self.fiat_transaction_to_record(t, fiats) for t in page) if record is not None]
+
+
+    def stream_records(self, write) -> None:
+        """
+        Fetch normalized records, passing each page to given function as soon as it arrives.
+        """
+
+        async def run():
+            async for records in self.iter_records():
+                write(records)
+
+        asyncio.run(run())
+
+
     def get_report(self) -> dict:
         """
         Get a full report by matching wallets, trades and transactions.
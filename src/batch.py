@@ -0,0 +1,178 @@
+import os
+import glob
+import time
+
+from .tax.readers import compressions, expand_paths, is_csv, split_archive
+from .utils import load_yaml
+
+
+def warm_up() -> None:
+    '''Imports heavy dependencies once per worker process (instead of once per report)'''
+
+    # Use non-interactive backend
+    import matplotlib
+    matplotlib.use('Agg')
+
+    # Import dependencies
+    import matplotlib.pyplot
+    import fpdf
+    import pyqrcode
+
+    from .tax import report, pdf
+    from .tax.readers import get_engine
+
+    # Import `pandas` only if used (as it's optional)
+    if get_engine() == 'pandas':
+        import pandas
+
+
+def get_base(input_file: str) -> str:
+    '''Strips extensions from CSV export (eg 'client.csv.gz'), placing archive members next to their archive'''
+
+    archive, member = split_archive(input_file)
+
+    if member:
+        input_file = os.path.join(os.path.dirname(archive), os.path.basename(member))
+
+    name, extension = os.path.splitext(input_file)
+
+    if extension.lower() in compressions:
+        name = os.path.splitext(name)[0]
+
+    return name
+
+
+def get_jobs(source: str, output_dir: str = '.', user_file: str = None, title: str = 'Bitpanda Report', file_format: str = 'pdf') -> list:
+    '''Builds job list from directory of CSV exports or YAML manifest'''
+
+    # Create data array
+    jobs = []
+
+    # If source is a directory ..
+    if os.path.isdir(source):
+        # .. use each (possibly compressed or archived) CSV file, along with user information (if available)
+        for input_file in [path for path in expand_paths([os.path.join(glob.escape(source), '*')]) if is_csv(path)]:
+            # Determine base name
+            base = get_base(input_file)
+
+            # Determine user information, looking for ..
+            # (1) .. 'client.yml' or 'client.yaml' next to 'client.csv'
+            # (2) .. default user information
+            job_user_file = user_file
+
+            for extension in ['yml', 'yaml']:
+                if os.path.isfile('{}.{}'.format(base, extension)):
+                    job_user_file = '{}.{}'.format(base, extension)
+
+                    break
+
+            jobs.append({
+                'input_file': input_file,
+                'user_file': job_user_file,
+                'output_file': os.path.join(output_dir, os.path.basename(base)),
+                'title': title,
+                'file_format': file_format,
+            })
+
+        return jobs
+
+    # .. otherwise, load manifest, looking like this:
+    #
+    # - input: clients/mustermann.csv
+    #   user: clients/mustermann.yml
+    #   output: reports/mustermann
+    #   title: Bitpanda Report 2021
+    with open(source, 'rb') as file:
+        manifest = load_yaml(file)
+
+    if not isinstance(manifest, list):
+        raise Exception('Invalid manifest "{}"'.format(source))
+
+    # Resolve paths relative to manifest
+    root = os.path.dirname(os.path.abspath(source))
+
+    for index, entry in enumerate(manifest, 1):
+        # Validate entry (reporting invalid ones as failed jobs, instead of aborting whole batch)
+        error = None
+
+        if not isinstance(entry, dict):
+            error = 'Invalid manifest entry (expected mapping)'
+
+        elif not isinstance(entry.get('input'), str):
+            error = 'Invalid manifest entry (missing "input")'
+
+        elif any(key in entry and not isinstance(entry[key], str) for key in ['user', 'output']):
+            error = 'Invalid manifest entry (expected "user" & "output" to be paths)'
+
+        if error:
+            jobs.append({
+                'input_file': '{} (entry {})'.format(source, index),
+                'user_file': None,
+                'output_file': None,
+                'title': title,
+                'file_format': file_format,
+                'error': error,
+            })
+
+            continue
+
+        input_file = os.path.join(root, entry['input'])
+        job_user_file = os.path.join(root, entry['user']) if 'user' in entry else user_file
+
+        # Determine output file
+        output_file = os.path.join(output_dir, os.path.basename(get_base(input_file)))
+
+        if 'output' in entry:
+            output_file = os.path.join(root, entry['output'])
+
+        jobs.append({
+            'input_file': input_file,
+            'user_file': job_user_file,
+            'output_file': output_file,
+            'title': entry.get('title', title),
+            'file_format': entry.get('format', file_format),
+        })
+
+    return jobs
+
+
+def run_job(job: dict) -> dict:
+    '''Renders single report, capturing (instead of raising) errors'''
+
+    # Import dependency
+    from .tax.report import Report
+
+    # Start timer
+    start = time.perf_counter()
+
+    # Create result (keeping errors of invalid jobs, see `get_jobs`)
+    result = dict(job, error=job.get('error'))
+
+    # Skip invalid jobs
+    if result['error']:
+        result['duration'] = 0.0
+
+        return result
+
+    try:
+        # Initialize object
+        obj = Report(job['input_file'])
+
+        # Configure it
+        if job['user_file']:
+            with open(job['user_file'], 'rb') as file:
+                user_info = load_yaml(file)
+
+            if user_info:
+                obj.user_info = user_info
+
+        # Fire it up
+        obj.render(job['output_file'], job['title'], job['file_format'])
+
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+
+    # Stop timer
+    result['duration'] = time.perf_counter() - start
+
+    return result
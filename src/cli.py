@@ -2,16 +2,68 @@ from io import BufferedReader
 
 import click
 
-from .api.bitpanda import Bitpanda
-from .tax.report import Report
-from .utils import load_yaml, dump_json, pretty_print
+from .tax import cost_basis_methods, section_types
+
+
+# Heavy dependencies (`pandas`, `httpx`, `fpdf` & `matplotlib`) are imported
+# inside commands that actually need them, keeping startup time low
+
+
+def validate_methods(ctx, param, value: str) -> list:
+    # Split comma-separated list
+    methods = [method.strip() for method in value.split(',') if method.strip()]
+
+    for method in methods:
+        if method not in cost_basis_methods:
+            raise click.BadParameter('Unknown method "{}" (choose from {})'.format(method, ', '.join(cost_basis_methods)))
+
+    if not methods:
+        raise click.BadParameter('Choose at least one method')
+
+    return methods
+
+
+def echo_table(rows: list) -> None:
+    if not rows:
+        click.echo('No results')
+
+        return
+
+    # Determine column widths
+    columns = list(rows[0].keys())
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+
+    # Print table
+    click.echo('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+
+    for row in rows:
+        click.echo('  '.join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def validate_sections(ctx, param, value: str) -> list:
+    # If not specified ..
+    if value is None:
+        # .. use all sections
+        return None
+
+    # Split comma-separated list
+    sections = [section.strip() for section in value.split(',') if section.strip()]
+
+    for section in sections:
+        if section not in section_types:
+            raise click.BadParameter('Unknown section "{}" (choose from {})'.format(section, ', '.join(section_types)))
+
+    return sections
 
 
 @click.group()
 @click.pass_context
-@click.option('-v', '--verbose', count=True, help='Enable verbose mode')
+@click.option('-v', '--verbose', count=True, help='Enable verbose mode (-vv: debug output)')
+@click.option('--log-format', default='text', type=click.Choice(['text', 'json']), help='Format of debug output (json: one object per line)')
+@click.option('--log-file', type=click.Path(dir_okay=False), help='File receiving debug output (instead of stderr)')
+@click.option('--log-sample', default=100, type=click.IntRange(min=1), help='Only log every n-th record per stage (after first ten)')
 @click.version_option('0.1.0')
-def cli(ctx, verbose: int) -> None:
+def cli(ctx, verbose: int, log_format: str, log_file: str, log_sample: int) -> None:
     """
     A simple CLI utility for reports on 'Bitpanda' portfolios
     """
@@ -22,24 +74,44 @@ def cli(ctx, verbose: int) -> None:
     # Initialize context object
     ctx.obj['verbose'] = verbose
 
+    # Set up logging (summarizing data structures, formatted only if actually logged)
+    from .logs import setup_logging
+
+    setup_logging(verbose, log_format, log_file, log_sample)
+
 
 @cli.command()
 @click.pass_context
-@click.argument('input_file', type=click.Path())
+@click.argument('input_files', nargs=-1, required=True)
 @click.option('-o', '--output-file', default='report', type=click.Path(), help='Output filename')
 @click.option('-u', '--user-file', type=click.File('rb'), help='YAML file holding user information')
 @click.option('-t', '--title', default='Bitpanda Report', help='PDF document title')
 @click.option('-n', '--name', help='First name and surname')
 @click.option('-s', '--street', help='Street address')
 @click.option('-c', '--city', help='Postcode and city')
-def report(ctx: dict, input_file: str, output_file: str, user_file: BufferedReader, title: str, name: str, street: str, city: str) -> None:
+@click.option('-f', '--format', 'file_format', default='pdf', type=click.Choice(['pdf', 'csv', 'json', 'xlsx', 'html']), help='Output file format')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1), help='Number of processes rendering PDF sections')
+@click.option('-y', '--year', type=int, help='Tax year (only considers transactions until its end)')
+@click.option('-S', '--sections', callback=validate_sections, help='Comma-separated list of report sections ({})'.format(', '.join(section_types)))
+@click.option('-e', '--engine', default='auto', type=click.Choice(['auto', 'pandas', 'csv', 'mmap']), help='CSV ingestion engine (auto: pandas, if installed; mmap: memory-mapped, for very large files)')
+@click.option('-b', '--cost-basis', default='fifo', type=click.Choice(cost_basis_methods), help='Cost-basis method (matching sales against lots)')
+@click.option('-k', '--checkpoint', help='Name of checkpoint (eg account) to resume from & update, processing only new rows')
+@click.option('-D', '--store', type=click.Path(dir_okay=False), help='SQLite database storing transactions (see "query" command)')
+@click.option('-M', '--metrics', 'metrics_file', type=click.Path(dir_okay=False), help='File receiving timing & memory metrics per stage (as JSON lines)')
+@click.option('-P', '--prices', 'price_file', type=click.Path(exists=True, dir_okay=False), help='CSV file with daily prices (Date, Asset, Price) valuing net worth (defaults to prices observed when trading)')
+@click.option('-H', '--price-store', type=click.Path(exists=True, dir_okay=False), help='Price store valuing transfers received without cost basis (see "prices" command)')
+def report(ctx: dict, input_files: tuple, output_file: str, user_file: BufferedReader, title: str, name: str, street: str, city: str, file_format: str, jobs: int, year: int, sections: list, engine: str, cost_basis: str, checkpoint: str, store: str, metrics_file: str, price_file: str, price_store: str) -> None:
     """
-    Creates report using an exported CSV file
+    Creates report using exported CSV file(s), optionally compressed (gz, bz2, xz) or zipped
     """
 
-    # Import dependency
+    # Import dependencies
     from datetime import datetime
 
+    from .logs import logger, summarize
+    from .tax.report import Report
+    from .utils import load_yaml
+
     # If verbose mode is enabled ..
     if ctx.obj['verbose'] > 0:
         # .. report title & date of creation
@@ -56,8 +128,8 @@ def report(ctx: dict, input_file: str, output_file: str, user_file: BufferedRead
 
         if ctx.obj['verbose'] > 0: click.echo('Loading user information ..')
 
-    # (3) If not ..
-    if not user_info:
+    # (3) If not (and needed for PDF cover) ..
+    if not user_info and file_format == 'pdf' and (not sections or 'cover' in sections):
         # .. ask for them
         user_info = {
             'name': name if name else click.prompt('Dein Name', type=str),
@@ -65,47 +137,469 @@ def report(ctx: dict, input_file: str, output_file: str, user_file: BufferedRead
             'city': city if city else click.prompt('PLZ und Ort', type=str),
         }
 
-    if ctx.obj['verbose'] > 1: click.echo('user_info: {}'.format(user_info))
+    logger.debug('user_info: %s', summarize(user_info))
 
-    # Initialize object
-    obj = Report(input_file)
+    # Initialize object (merging multiple files & expanding glob patterns)
+    obj = Report(list(input_files))
 
     # Configure it
     obj.verbose = ctx.obj['verbose']
     obj.user_info = user_info
+    obj.jobs = jobs
+    obj.year = year
+    obj.sections = sections
+    obj.engine = engine
+    obj.cost_basis = cost_basis
+    obj.checkpoint = checkpoint
+    obj.store = store
+    obj.price_file = price_file
+    obj.price_store = price_store
+
+    # If enabled ..
+    if metrics_file:
+        # .. collect metrics per stage
+        from .tax.metrics import Metrics
+
+        obj.metrics = Metrics()
 
     # Fire it up
-    obj.render(output_file, title)
+    try:
+        obj.render(output_file, title, file_format)
+
+    finally:
+        # Store metrics (even if rendering failed)
+        if metrics_file:
+            obj.metrics.dump(metrics_file)
+
+
+@cli.command()
+@click.pass_context
+@click.argument('source', type=click.Path(exists=True))
+@click.option('-o', '--output-dir', default='.', type=click.Path(file_okay=False), help='Output directory')
+@click.option('-u', '--user-file', type=click.Path(exists=True, dir_okay=False), help='YAML file holding default user information')
+@click.option('-t', '--title', default='Bitpanda Report', help='PDF document title')
+@click.option('-f', '--format', 'file_format', default='pdf', type=click.Choice(['pdf', 'csv', 'json', 'xlsx', 'html']), help='Output file format')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help='Number of worker processes (defaults to CPU count)')
+def batch(ctx: dict, source: str, output_dir: str, user_file: str, title: str, file_format: str, jobs: int) -> None:
+    """
+    Creates reports for directory (or YAML manifest) of exported CSV files
+    """
+
+    # Import dependencies
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from .batch import get_jobs, run_job, warm_up
+    from .utils import create_path
+
+    # Gather jobs
+    job_list = get_jobs(source, output_dir, user_file, title, file_format)
+
+    if not job_list:
+        click.echo('No CSV files found.')
+
+        return
+
+    # Attempt to create output directory ..
+    if not create_path(output_dir):
+        # .. otherwise abort
+        click.Context.fail(ctx, 'Unable to create output directory "{}"'.format(output_dir))
+
+    if ctx.obj['verbose'] > 0: click.echo('Rendering {} reports ..'.format(len(job_list)))
+
+    # Start timer
+    start = time.perf_counter()
+
+    # Keep track of failures
+    failures = []
+
+    # Render reports using pool of warmed-up workers
+    with ProcessPoolExecutor(max_workers=jobs, initializer=warm_up) as executor:
+        futures = {executor.submit(run_job, job): job for job in job_list}
+
+        for count, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+
+            # Guard against crashing workers
+            except Exception as e:
+                result = dict(futures[future], error='{}: {}'.format(type(e).__name__, e), duration=0)
+
+            # Report progress & throughput
+            elapsed = time.perf_counter() - start
+            status = 'failed' if result['error'] else 'done'
+
+            click.echo('[{}/{}] {} {} ({:.2f}s, {:.2f} reports/s)'.format(count, len(job_list), status, result['input_file'], result['duration'], count / elapsed))
+
+            if result['error']:
+                failures.append(result)
+
+                if ctx.obj['verbose'] > 0: click.echo('  {}'.format(result['error']))
+
+    # Present summary
+    elapsed = time.perf_counter() - start
+
+    click.echo('Rendered {} of {} reports in {:.2f}s ({:.2f} reports/s).'.format(len(job_list) - len(failures), len(job_list), elapsed, len(job_list) / elapsed))
+
+    # If any job failed ..
+    if failures:
+        # .. list them
+        for result in failures:
+            click.echo('Failed: {} ({})'.format(result['input_file'], result['error']), err=True)
+
+        # .. exit with error code
+        ctx.exit(1)
+
+
+@cli.command()
+@click.pass_context
+@click.option('--host', default='127.0.0.1', help='Host address')
+@click.option('-p', '--port', default=8000, type=int, help='Port')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help='Number of worker processes (defaults to CPU count)')
+@click.option('-q', '--queue-size', default=32, type=click.IntRange(min=1), help='Maximum number of pending jobs')
+def serve(ctx: dict, host: str, port: int, jobs: int, queue_size: int) -> None:
+    """
+    Runs local HTTP service creating reports on demand
+    """
+
+    # Import dependency
+    from .server import serve
+
+    click.echo('Serving reports on http://{}:{} (POST /report, GET /metrics) ..'.format(host, port))
+
+    try:
+        serve(host, port, jobs, queue_size, ctx.obj['verbose'])
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+
+@cli.command()
+@click.pass_context
+@click.argument('input_files', nargs=-1, required=True)
+@click.option('-o', '--output-prefix', default='profile', type=click.Path(), help='Prefix of created files (pstats, collapsed stacks, metrics)')
+@click.option('-f', '--format', 'file_format', default='pdf', type=click.Choice(['pdf', 'csv', 'json', 'xlsx', 'html']), help='Output file format (of discarded report)')
+@click.option('-e', '--engine', default='auto', type=click.Choice(['auto', 'pandas', 'csv', 'mmap']), help='CSV ingestion engine')
+@click.option('-m', '--memory', is_flag=True, help='Trace memory allocations (slower)')
+@click.option('-n', '--top', default=20, type=click.IntRange(min=1), help='Number of listed functions & allocations')
+def profile(ctx: dict, input_files: tuple, output_prefix: str, file_format: str, engine: str, memory: bool, top: int) -> None:
+    """
+    Profiles report pipeline for given CSV file(s)
+    """
+
+    # Import dependency
+    from .profiler import profile as run_profile
+
+    try:
+        result = run_profile(list(input_files), output_prefix, file_format, engine, memory, top)
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+    # Report time spent per stage
+    click.echo('{:<24} {:>6} {:>10} {:>10}'.format('stage', 'count', 'wall [s]', 'cpu [s]'))
+
+    totals = {}
+
+    for record in result['stages']:
+        count, wall, cpu = totals.get(record['stage'], (0, 0, 0))
+        totals[record['stage']] = (count + 1, wall + record['wall'], cpu + record['cpu'])
+
+    for stage, (count, wall, cpu) in totals.items():
+        click.echo('{:<24} {:>6} {:>10.3f} {:>10.3f}'.format(stage, count, wall, cpu))
+
+    # Report slowest functions
+    if ctx.obj['verbose'] > 0:
+        click.echo(result['functions'])
+
+    for name, path in result['files'].items():
+        click.echo('Created {} ({})'.format(path, name))
+
+
+@cli.command()
+@click.pass_context
+@click.argument('database', type=click.Path(exists=True, dir_okay=False))
+@click.argument('aggregation', type=click.Choice(['pnl', 'fees', 'holdings']))
+@click.option('-a', '--asset-class', type=click.Choice(['fiat', 'metal', 'crypto', 'stocks']), help='Asset class')
+@click.option('-d', '--date', type=click.DateTime(['%Y-%m-%d']), help='Date of holdings (defaults to today)')
+@click.option('-f', '--format', 'file_format', default='text', type=click.Choice(['text', 'json']), help='Output format')
+def query(ctx: dict, database: str, aggregation: str, asset_class: str, date, file_format: str) -> None:
+    """
+    Aggregates transactions stored by "report --store" (pnl: realized wins & losses of sales & withdrawals, same as "compare"; fees; holdings)
+    """
+
+    # Import dependencies
+    import json
+    from datetime import datetime
+
+    from .tax.store import connect, query as run_query
+
+    connection = connect(database)
+
+    try:
+        rows = run_query(connection, aggregation, asset_class, (date or datetime.today()).strftime('%Y-%m-%d'))
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+    finally:
+        connection.close()
+
+    if file_format == 'json':
+        click.echo(json.dumps(rows, ensure_ascii=False, indent=4))
+
+        return
+
+    echo_table(rows)
+
+
+@cli.command()
+@click.pass_context
+@click.argument('input_files', nargs=-1)
+@click.option('-k', '--checkpoint', 'checkpoints', multiple=True, help='Name of checkpoint (eg account) saved by "report --checkpoint" (may be repeated)')
+@click.option('-t', '--tax-free-on', type=click.DateTime(['%Y-%m-%d']), help='Date of sale (defaults to today)')
+@click.option('-a', '--asset-class', type=click.Choice(['metal', 'crypto', 'stocks']), help='Asset class')
+@click.option('-e', '--engine', default='auto', type=click.Choice(['auto', 'pandas', 'csv', 'mmap']), help='CSV ingestion engine (when using CSV files)')
+@click.option('-f', '--format', 'file_format', default='text', type=click.Choice(['text', 'json']), help='Output format')
+def holdings(ctx: dict, input_files: tuple, checkpoints: tuple, tax_free_on, asset_class: str, engine: str, file_format: str) -> None:
+    """
+    Lists holdings sellable tax-free on given date (using checkpoints or CSV files)
+    """
+
+    # Import dependencies
+    import json
+    from datetime import datetime
+
+    from .tax.index import load_index
+    from .tax.ledger import get_checkpoint_file
+
+    day = (tax_free_on or datetime.today()).date()
+
+    # Create data array
+    rows = []
+
+    try:
+        # Either process CSV files (resuming from checkpoint, if given) ..
+        if input_files:
+            from .tax.report import Report
+
+            if len(checkpoints) > 1:
+                raise Exception('CSV files only support one checkpoint')
+
+            obj = Report(list(input_files))
+            obj.verbose = ctx.obj['verbose']
+            obj.engine = engine
+            obj.checkpoint = checkpoints[0] if checkpoints else None
+
+            obj.update_checkpoint()
+            obj.get('balance')
+
+            rows = obj.get('ledger').get_tax_free_index().query(day, asset_class)
+
+        # .. or use indexes stored alongside checkpoints (answering without loading any ledger)
+        elif checkpoints:
+            for name in checkpoints:
+                index = load_index(get_checkpoint_file(name))
+
+                if index is None:
+                    raise Exception('No index for checkpoint "{}" (create it using "report --checkpoint {}")'.format(name, name))
+
+                for row in index.query(day, asset_class):
+                    rows.append(dict({'account': name}, **row) if len(checkpoints) > 1 else row)
+
+        else:
+            raise Exception('Please provide CSV files or checkpoint')
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+    if file_format == 'json':
+        click.echo(json.dumps(rows, ensure_ascii=False, indent=4))
+
+        return
+
+    echo_table([dict(row, **{key: '{:.6f}'.format(row[key]) for key in ['quantity', 'tax_free', 'taxable']}, next_tax_free=row['next_tax_free'] or '-') for row in rows])
+
+
+@cli.command()
+@click.pass_context
+@click.argument('input_files', nargs=-1, required=True)
+@click.option('-m', '--methods', default='fifo,lifo,hifo,average', callback=validate_methods, help='Comma-separated list of cost-basis methods ({})'.format(', '.join(cost_basis_methods)))
+@click.option('-y', '--year', type=int, help='Tax year (only considers transactions until its end)')
+@click.option('-e', '--engine', default='auto', type=click.Choice(['auto', 'pandas', 'csv', 'mmap']), help='CSV ingestion engine')
+@click.option('-H', '--price-store', type=click.Path(exists=True, dir_okay=False), help='Price store valuing transfers received without cost basis')
+@click.option('-f', '--format', 'file_format', default='text', type=click.Choice(['text', 'json']), help='Output format')
+def compare(ctx: dict, input_files: tuple, methods: list, year: int, engine: str, price_store: str, file_format: str) -> None:
+    """
+    Compares taxable wins & losses of cost-basis methods (computed in one pass)
+    """
+
+    # Import dependencies
+    import json
+
+    from .tax.fixed import amount_decimals, from_fixed
+    from .tax.report import Report
+
+    # Initialize object
+    obj = Report(list(input_files))
+
+    # Configure it
+    obj.verbose = ctx.obj['verbose']
+    obj.year = year
+    obj.engine = engine
+    obj.cost_basis = methods[0]
+    obj.compare = methods
+    obj.price_store = price_store
+
+    try:
+        comparison = obj.get('comparison')
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+    # Create data array (one row per year & asset class)
+    rows = []
+    keys = sorted({(sale_year, mode) for sums in comparison.values() for mode, years in sums.items() for sale_year in years})
+
+    for sale_year, mode in keys + [('total', None)]:
+        row = {'year': sale_year, 'asset_class': mode or ''}
+
+        for method, sums in comparison.items():
+            # Sum up all years & asset classes (for last row)
+            if mode is None:
+                cents = sum(sum(years.values()) for years in sums.values())
+
+            else:
+                cents = sums[mode].get(sale_year, 0)
+
+            row[method] = from_fixed(cents, amount_decimals)
+
+        rows.append(row)
+
+    if file_format == 'json':
+        click.echo(json.dumps(rows, ensure_ascii=False, indent=4))
+
+        return
+
+    echo_table([dict(row, **{method: '{:.2f}'.format(row[method]) for method in comparison.keys()}) for row in rows])
+
+
+@cli.command()
+@click.pass_context
+@click.argument('input_files', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('-s', '--store', 'store_file', type=click.Path(dir_okay=False), help='Price store (defaults to app directory)')
+def prices(ctx: dict, input_files: tuple, store_file: str) -> None:
+    """
+    Imports price history (CSV files with Date, Asset & Price columns) into price store
+    """
+
+    # Import dependency
+    from .tax.prices import get_store_file, import_prices
+
+    # If not specified ..
+    if not store_file:
+        # .. use default location
+        store_file = get_store_file()
+
+    if ctx.obj['verbose'] > 0: click.echo('Importing {} price files ..'.format(len(input_files)))
+
+    try:
+        store = import_prices(list(input_files), store_file)
+
+    except Exception as e:
+        click.Context.fail(ctx, e)
+
+    click.echo('Stored {} prices of {} assets in "{}".'.format(len(store), len(store.get_assets()), store_file))
 
 
 @cli.command()
 @click.pass_context
 @click.option('-k', '--api-key', prompt=True, hide_input=True, help='API key')
-@click.option('-o', '--output-file', default='report', type=click.Path(), help='Output filename')
-def connect(ctx: dict, api_key: str, output_file: str) -> None:
+@click.option('-o', '--output-file', default='report', type=click.Path(), help='Output filename (without extension, "-" for standard output)')
+@click.option('-f', '--format', 'file_format', default='json', type=click.Choice(['json', 'ndjson']), help='Output format (ndjson: one transaction per line, written as fetched)')
+@click.option('-i', '--indent', type=click.IntRange(min=0), help='Indent JSON output (compact by default)')
+@click.option('--pdf', is_flag=True, help='Create PDF report from fetched transactions (instead of JSON summary)')
+@click.option('-u', '--user-file', type=click.File('rb'), help='YAML file holding user information (PDF only)')
+@click.option('-t', '--title', default='Bitpanda Report', help='PDF document title')
+@click.option('-y', '--year', type=int, help='Tax year (only considers transactions until its end)')
+def connect(ctx: dict, api_key: str, output_file: str, file_format: str, indent: int, pdf: bool, user_file: BufferedReader, title: str, year: int) -> None:
     """
     Creates report using the 'Bitpanda' API
     """
 
-    # Import dependency
-    import asyncio
+    # Import dependencies
+    from .api.bitpanda import Bitpanda
+    from .logs import logger, summarize
+    from .utils import JsonLinesWriter, dump_json, load_yaml
 
     # If not specified ..
     if not api_key:
         # .. ask for API key
         api_key = click.prompt('Please enter your API key')
 
+    # If PDF report is requested ..
+    if pdf:
+        from .tax.report import Report
+
+        # .. determine user information (as displayed on report cover)
+        user_info = load_yaml(user_file) if user_file else {}
+
+        if not user_info:
+            user_info = {
+                'name': click.prompt('Dein Name', type=str),
+                'street': click.prompt('Straße & Hausnummer', type=str),
+                'city': click.prompt('PLZ und Ort', type=str),
+            }
+
+        # .. fetch transactions (as normalized records, skipping CSV export)
+        if ctx.obj['verbose'] > 0: click.echo('Fetching transactions ..')
+
+        try:
+            obj = Report()
+            obj.records = Bitpanda(api_key).get_records()
+
+            # Configure report
+            obj.verbose = ctx.obj['verbose']
+            obj.user_info = user_info
+            obj.year = year
+
+            obj.render(output_file, title)
+
+        except Exception as e:
+            click.Context.fail(ctx, e)
+
+        return
+
+    # Determine output (keeping standard output free of progress messages)
+    to_stdout = output_file == '-'
+    output = output_file if to_stdout else '{}.{}'.format(output_file, file_format)
+
+    # If streaming is requested ..
+    if file_format == 'ndjson':
+        # .. write transactions page by page (as normalized records)
+        if ctx.obj['verbose'] > 0: click.echo('Fetching transactions ..', err=to_stdout)
+
+        try:
+            with JsonLinesWriter(output) as writer:
+                Bitpanda(api_key).stream_records(writer.write)
+
+        except Exception as e:
+            click.Context.fail(ctx, e)
+
+        if ctx.obj['verbose'] > 0: click.echo('Wrote {} transactions ..'.format(writer.count), err=to_stdout)
+
+        return
+
     # Fetch report
-    if ctx.obj['verbose'] > 0: click.echo('Fetching portfolio ..')
+    if ctx.obj['verbose'] > 0: click.echo('Fetching portfolio ..', err=to_stdout)
 
     try:
         report = Bitpanda(api_key).get_report()
 
-        # Present findings
-        if ctx.obj['verbose'] > 1:
-            pretty_print(report)
+        # Present findings (summarized)
+        logger.debug('report: %s', summarize(report), extra={'stage': 'connect'})
 
-        dump_json(report, '{}.json'.format(output_file))
+        dump_json(report, output, indent)
 
     except Exception as e:
         click.Context.fail(ctx, e)
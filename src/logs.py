@@ -0,0 +1,158 @@
+import json
+import logging
+from itertools import islice
+
+
+# Define globally ..
+# (1) .. logger (shared by all modules)
+logger = logging.getLogger('bitpanda')
+
+# (2) .. log levels (per level of verbosity)
+levels = {
+    0: logging.WARNING,
+    1: logging.INFO,
+    2: logging.DEBUG,
+}
+
+
+class Summary:
+    '''Size-capped view of (possibly huge) data structure, formatted only when actually logged'''
+
+    __slots__ = ('data', 'limit', 'max_length')
+
+
+    def __init__(self, data, limit: int = 3, max_length: int = 200) -> None:
+        self.data = data
+
+        # Determine number of first & last items (per list) & maximum length (per item)
+        self.limit = limit
+        self.max_length = max_length
+
+
+    def shorten(self, item) -> str:
+        text = item if isinstance(item, str) else repr(item)
+
+        if len(text) > self.max_length:
+            return '{} ..'.format(text[:self.max_length])
+
+        return text
+
+
+    def summarize(self, data, depth: int = 0):
+        # Summarize mappings (per key) ..
+        if isinstance(data, dict) and depth < 2:
+            items = {str(key): self.summarize(value, depth + 1) for key, value in islice(data.items(), self.limit * 4)}
+
+            if len(data) > len(items):
+                items['..'] = '{} more keys'.format(len(data) - len(items))
+
+            return items
+
+        # .. collections (by count, first & last items) ..
+        if isinstance(data, (list, tuple, set)):
+            if len(data) <= self.limit * 2:
+                return [self.shorten(item) for item in data]
+
+            items = list(data) if isinstance(data, set) else data
+
+            return {
+                'count': len(items),
+                'first': [self.shorten(item) for item in items[:self.limit]],
+                'last': [self.shorten(item) for item in items[-self.limit:]],
+            }
+
+        # .. and everything else
+        if isinstance(data, (int, float, bool)) or data is None:
+            return data
+
+        return self.shorten(data)
+
+
+    def to_dict(self):
+        return self.summarize(self.data)
+
+
+    def __str__(self) -> str:
+        return json.dumps(self.summarize(self.data), ensure_ascii=False)
+
+
+def summarize(data, limit: int = 3) -> Summary:
+    '''Wraps data (for use as logging argument), so that only its summary gets formatted (if ever)'''
+
+    return Summary(data, limit)
+
+
+class Sampler(logging.Filter):
+    '''Passes first records per stage, then every n-th one (dropping the rest)'''
+
+    def __init__(self, burst: int = 10, rate: int = 100) -> None:
+        super().__init__()
+
+        self.burst = burst
+        self.rate = rate
+
+        # Count records (per stage)
+        self.counts = {}
+
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Always pass records outside of stages
+        stage = getattr(record, 'stage', None)
+
+        if stage is None:
+            return True
+
+        count = self.counts.get(stage, 0) + 1
+        self.counts[stage] = count
+
+        return count <= self.burst or (count - self.burst) % self.rate == 0
+
+
+class JsonFormatter(logging.Formatter):
+    '''Formats records as JSON objects (one per line), keeping summaries structured'''
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'stage': getattr(record, 'stage', None),
+            'message': record.getMessage(),
+        }
+
+        # Add summaries (as data rather than text)
+        args = record.args if isinstance(record.args, tuple) else ()
+        summaries = [arg.to_dict() for arg in args if isinstance(arg, Summary)]
+
+        if summaries:
+            entry['data'] = summaries
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(verbose: int = 0, log_format: str = 'text', log_file: str = None, sample_rate: int = 100) -> None:
+    '''Configures logger (level by verbosity, output as text or JSON lines)'''
+
+    # Write to file (or standard error)
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+
+    else:
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+
+    # Sample records inside of loops (if enabled)
+    if sample_rate > 1:
+        handler.addFilter(Sampler(rate=sample_rate))
+
+    # Replace previous handlers (if any)
+    for previous in logger.handlers[:]:
+        logger.removeHandler(previous)
+        previous.close()
+
+    logger.addHandler(handler)
+    logger.setLevel(levels.get(verbose, logging.DEBUG))
+    logger.propagate = False
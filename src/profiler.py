@@ -0,0 +1,237 @@
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from .tax.metrics import Metrics
+
+
+def get_module_path(filename: str) -> str:
+    '''Shortens filename to path of module (eg 'click/core.py')'''
+
+    # Determine longest import path containing file
+    prefixes = [path for path in sys.path if path and filename.startswith(os.path.join(path, ''))]
+
+    if prefixes:
+        return os.path.relpath(filename, max(prefixes, key=len))
+
+    return filename
+
+
+# Define files whose allocations are skipped (imports & profiler itself)
+skipped_files = {
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    cProfile.__file__,
+    tracemalloc.__file__,
+    __file__,
+}
+
+
+def get_top_statistics(statistics: list, top: int) -> list:
+    '''Picks top allocation sites (filtering grouped statistics, as filtering snapshots is slow)'''
+
+    return [statistic for statistic in statistics if statistic.traceback[0].filename not in skipped_files][:top]
+
+
+class Profiler(Metrics):
+    '''Samples call stacks (attributing them to pipeline stages & sections) while collecting metrics'''
+
+    def __init__(self, interval: float = 0.001, top: int = 20) -> None:
+        super().__init__()
+
+        # Determine sampling interval (in seconds) & thread being sampled
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+
+        # Keep track of current stages (as they may be nested)
+        self.stages = []
+
+        # Count samples (per collapsed stack)
+        self.samples = Counter()
+
+        # Keep top allocation sites (per stage, if tracing allocations)
+        self.top = top
+        self.allocations = []
+
+        # Set up sampling thread
+        self.running = False
+        self.thread = None
+
+
+    @contextmanager
+    def measure(self, stage: str, **fields):
+        self.stages.append(stage)
+
+        try:
+            with super().measure(stage, **fields) as record:
+                # If enabled ..
+                if tracemalloc.is_tracing():
+                    # .. measure allocations, too
+                    snapshot = tracemalloc.take_snapshot()
+                    start = tracemalloc.get_traced_memory()[0]
+
+                    # Reset peak (if supported, see Python 3.9+)
+                    if hasattr(tracemalloc, 'reset_peak'):
+                        tracemalloc.reset_peak()
+
+                    yield record
+
+                    current, peak = tracemalloc.get_traced_memory()
+                    record['allocated'] = current - start
+
+                    if hasattr(tracemalloc, 'reset_peak'):
+                        record['peak_allocated'] = peak - start
+
+                    # Attribute allocations to sites (including those of nested stages)
+                    self.allocations.append((stage, get_top_statistics(tracemalloc.take_snapshot().compare_to(snapshot, 'lineno'), self.top)))
+
+                else:
+                    yield record
+
+        finally:
+            self.stages.pop()
+
+
+    def get_stack(self, frame) -> list:
+        # Create data array
+        stack = []
+
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{} ({}:{})'.format(code.co_name, get_module_path(code.co_filename), code.co_firstlineno))
+            frame = frame.f_back
+
+        # Start with outermost frame
+        return stack[::-1]
+
+
+    def sample(self) -> None:
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is not None:
+                # Prefix stack with current stages (eg 'stage:add_tax_pages')
+                stages = ['stage:{}'.format(stage) for stage in self.stages] or ['stage:other']
+                self.samples[';'.join(stages + self.get_stack(frame))] += 1
+
+            time.sleep(self.interval)
+
+
+    def start(self) -> None:
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+
+    def stop(self) -> None:
+        self.running = False
+        self.thread.join()
+
+
+    def dump_collapsed(self, output_file: str) -> None:
+        '''Stores samples as collapsed stacks (as consumed by eg 'flamegraph.pl' or speedscope)'''
+
+        with open(output_file, 'w') as file:
+            for stack, count in sorted(self.samples.items()):
+                file.write('{} {}\n'.format(stack, count))
+
+
+def profile(input_files: list, output_prefix: str = 'profile', file_format: str = 'pdf', engine: str = None, memory: bool = False, top: int = 20) -> dict:
+    '''Runs report pipeline under profiler, returning created files & summary'''
+
+    # Import dependencies
+    from .tax.readers import get_engine
+    from .tax.report import Report
+
+    # Initialize object
+    obj = Report(input_files)
+    obj.engine = engine
+
+    # Collect metrics (& samples) per stage
+    obj.metrics = Profiler(top=top)
+
+    # Create files (next to each other)
+    files = {
+        'pstats': '{}.pstats'.format(output_prefix),
+        'collapsed': '{}.collapsed'.format(output_prefix),
+        'stages': '{}-stages.jsonl'.format(output_prefix),
+    }
+
+    if memory:
+        files['memory'] = '{}-memory.txt'.format(output_prefix)
+
+        # Import heavy dependencies before tracing (keeping their allocations out of snapshots taken per stage)
+        import matplotlib.pyplot
+        from .tax import pdf
+
+        if get_engine(engine) == 'pandas':
+            import pandas
+
+        tracemalloc.start()
+
+    profiler = cProfile.Profile()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        obj.metrics.start()
+        profiler.enable()
+
+        try:
+            # Fire it up (discarding report)
+            obj.render(os.path.join(temp_dir, 'report'), file_format=file_format)
+
+            # Keep remaining allocations
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+
+        finally:
+            profiler.disable()
+            obj.metrics.stop()
+
+            # Stop tracing (even if rendering failed)
+            if memory:
+                tracemalloc.stop()
+
+    # Store results
+    # (1) Deterministic profile
+    profiler.dump_stats(files['pstats'])
+
+    # (2) Samples as collapsed stacks
+    obj.metrics.dump_collapsed(files['collapsed'])
+
+    # (3) Metrics per stage
+    if os.path.exists(files['stages']):
+        os.remove(files['stages'])
+
+    obj.metrics.dump(files['stages'])
+
+    # (4) Top allocations ..
+    if memory:
+        with open(files['memory'], 'w') as file:
+            # (a) .. remaining after rendering
+            for index, statistic in enumerate(get_top_statistics(snapshot.statistics('lineno'), top), 1):
+                file.write('#{} {}: {:.1f} KiB ({} blocks)\n'.format(index, statistic.traceback[0], statistic.size / 1024, statistic.count))
+
+            # (b) .. made per stage & section (as differences)
+            for stage, statistics in obj.metrics.allocations:
+                file.write('\nstage:{}\n'.format(stage))
+
+                for index, statistic in enumerate(statistics, 1):
+                    file.write('#{} {}: {:+.1f} KiB ({:+d} blocks)\n'.format(index, statistic.traceback[0], statistic.size_diff / 1024, statistic.count_diff))
+
+    # Summarize slowest functions
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+
+    return {
+        'files': files,
+        'stages': obj.metrics.records,
+        'functions': stream.getvalue(),
+    }
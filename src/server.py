@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from collections import deque
+from datetime import MINYEAR, MAXYEAR
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .batch import warm_up
+from .tax import section_types
+
+
+# Define globally ..
+# (1) .. content types (by file format)
+content_types = {
+    'pdf': 'application/pdf',
+    'json': 'application/json',
+    'html': 'text/html; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# (2) .. number of latencies used for metrics
+latency_window = 1000
+
+# (3) .. accepted JSON options (& their types)
+option_types = {
+    'path': str,
+    'format': str,
+    'title': str,
+    'year': int,
+    'sections': list,
+    'user_info': dict,
+}
+
+
+class QueueFull(Exception):
+    pass
+
+
+def render_job(job: dict) -> bytes:
+    '''Renders single report inside worker process, returning its contents'''
+
+    # Import dependency
+    from .tax.report import Report
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Determine input file
+        input_file = job.get('path')
+
+        # If CSV data was uploaded ..
+        if 'data' in job:
+            # .. store it (as `Report` expects a file)
+            input_file = os.path.join(temp_dir, 'input.csv')
+
+            with open(input_file, 'wb') as file:
+                file.write(job['data'])
+
+        # Initialize object
+        obj = Report(input_file)
+
+        # Configure it
+        if job.get('user_info'):
+            obj.user_info = job['user_info']
+
+        obj.year = job.get('year')
+        obj.sections = job.get('sections')
+
+        # Fire it up
+        output_file = os.path.join(temp_dir, 'report')
+        obj.render(output_file, job.get('title', 'Bitpanda Report'), job['format'])
+
+        with open('{}.{}'.format(output_file, job['format']), 'rb') as file:
+            return file.read()
+
+
+class Service:
+    '''Bounded job queue in front of warmed-up worker processes'''
+
+    def __init__(self, workers: int = None, queue_size: int = 32) -> None:
+        # Determine number of workers
+        self.workers = workers or os.cpu_count() or 1
+
+        # Create worker pool
+        self.executor = None
+        self.pool_lock = threading.Lock()
+        self.start_workers()
+
+        # Limit number of pending jobs
+        self.queue_size = queue_size
+        self.slots = threading.BoundedSemaphore(queue_size)
+
+        # Set up metrics
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=latency_window)
+
+
+    def start_workers(self) -> None:
+        '''Creates worker pool (importing heavy dependencies once per worker), starting workers right away'''
+
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+
+        # Start workers (so first requests don't pay for imports)
+        try:
+            for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+
+        except BrokenProcessPool:
+            raise Exception('Unable to start workers (they crashed while importing dependencies)')
+
+
+    def restart_workers(self, executor: ProcessPoolExecutor) -> None:
+        '''Replaces broken worker pool (unless another request did so already)'''
+
+        with self.pool_lock:
+            if self.executor is executor:
+                executor.shutdown(wait=False)
+                self.start_workers()
+
+
+    def submit(self, job: dict) -> bytes:
+        # If queue is full ..
+        if not self.slots.acquire(blocking=False):
+            # .. reject job
+            with self.lock:
+                self.rejected += 1
+
+            raise QueueFull('Queue is full ({} jobs)'.format(self.queue_size))
+
+        # Start timer
+        start = time.perf_counter()
+
+        with self.lock:
+            self.pending += 1
+
+        executor = self.executor
+
+        try:
+            result = executor.submit(render_job, job).result()
+
+            with self.lock:
+                self.completed += 1
+
+            return result
+
+        except BrokenProcessPool:
+            with self.lock:
+                self.failed += 1
+
+            # Replace worker pool (as it rejects any later job otherwise)
+            self.restart_workers(executor)
+
+            raise Exception('Worker crashed while rendering report (workers were restarted)')
+
+        except Exception:
+            with self.lock:
+                self.failed += 1
+
+            raise
+
+        finally:
+            with self.lock:
+                self.pending -= 1
+                self.latencies.append(time.perf_counter() - start)
+
+            self.slots.release()
+
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+            metrics = {
+                'queue_depth': self.pending,
+                'queue_size': self.queue_size,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'latency': {},
+            }
+
+        if latencies:
+            metrics['latency'] = {
+                'count': len(latencies),
+                'mean': sum(latencies) / len(latencies),
+                'p50': latencies[int(len(latencies) * 0.50)],
+                'p95': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+                'max': latencies[-1],
+            }
+
+        return metrics
+
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # Define service (set when serving)
+    service = None
+
+
+    def send(self, status: int, body: bytes, content_type: str = 'application/json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def send_json(self, status: int, data: dict) -> None:
+        self.send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+
+        if path == '/metrics':
+            self.send_json(200, self.service.get_metrics())
+
+        elif path == '/health':
+            self.send_json(200, {'status': 'ok'})
+
+        else:
+            self.send_json(404, {'error': 'Not found'})
+
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+
+        if url.path != '/report':
+            self.send_json(404, {'error': 'Not found'})
+
+            return
+
+        # Read request body
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        # Build job from ..
+        # (1) .. query parameters
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        job = {
+            'format': params.get('format', 'pdf'),
+            'title': params.get('title', 'Bitpanda Report'),
+        }
+
+        if 'year' in params:
+            if not params['year'].isdigit():
+                self.send_json(400, {'error': 'Invalid year "{}"'.format(params['year'])})
+
+                return
+
+            job['year'] = int(params['year'])
+
+        if 'sections' in params:
+            job['sections'] = [section.strip() for section in params['sections'].split(',') if section.strip()]
+
+        # (2) .. request body, being either ..
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            # (a) .. JSON options (eg path to CSV file)
+            try:
+                options = json.loads(body)
+
+            except ValueError:
+                self.send_json(400, {'error': 'Invalid JSON'})
+
+                return
+
+            if not isinstance(options, dict):
+                self.send_json(400, {'error': 'Invalid JSON (expected object)'})
+
+                return
+
+            # Only accept CSV data as request body (as `render_job` writes bytes)
+            if 'data' in options:
+                self.send_json(400, {'error': 'Unexpected "data" (upload CSV data as request body instead)'})
+
+                return
+
+            # Only accept known options (of expected types)
+            for key, value in options.items():
+                if key not in option_types:
+                    self.send_json(400, {'error': 'Unknown option "{}" (choose from {})'.format(key, ', '.join(option_types))})
+
+                    return
+
+                if not isinstance(value, option_types[key]) or isinstance(value, bool):
+                    self.send_json(400, {'error': 'Invalid "{}" (expected {})'.format(key, option_types[key].__name__)})
+
+                    return
+
+            if not all(isinstance(value, str) for value in options.get('user_info', {}).values()):
+                self.send_json(400, {'error': 'Invalid "user_info" (expected strings)'})
+
+                return
+
+            job.update(options)
+
+            if 'path' not in job:
+                self.send_json(400, {'error': 'Missing "path"'})
+
+                return
+
+        else:
+            # (b) .. uploaded CSV data
+            job['data'] = body
+
+        if job['format'] not in content_types:
+            self.send_json(400, {'error': 'Unsupported format "{}"'.format(job['format'])})
+
+            return
+
+        if 'year' in job and not MINYEAR <= job['year'] <= MAXYEAR:
+            self.send_json(400, {'error': 'Invalid year "{}"'.format(job['year'])})
+
+            return
+
+        if 'sections' in job:
+            if not all(isinstance(section, str) for section in job['sections']):
+                self.send_json(400, {'error': 'Invalid sections (expected list of strings)'})
+
+                return
+
+            for section in job['sections']:
+                if section not in section_types:
+                    self.send_json(400, {'error': 'Unknown section "{}" (choose from {})'.format(section, ', '.join(section_types))})
+
+                    return
+
+        try:
+            result = self.service.submit(job)
+
+        except QueueFull as e:
+            self.send_json(503, {'error': str(e)})
+
+            return
+
+        except Exception as e:
+            self.send_json(500, {'error': '{}: {}'.format(type(e).__name__, e)})
+
+            return
+
+        self.send(200, result, content_types[job['format']])
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = None, queue_size: int = 32, verbose: int = 0) -> None:
+    '''Runs report service until interrupted'''
+
+    # Set up service
+    service = Service(workers, queue_size)
+
+    # Create handler class bound to service
+    handler = type('Handler', (RequestHandler,), {'service': service})
+
+    # If not in verbose mode ..
+    if not verbose:
+        # .. silence request logging
+        handler.log_message = lambda *args: None
+
+    server = ThreadingHTTPServer((host, port), handler)
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()
+        service.shutdown()
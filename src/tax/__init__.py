@@ -0,0 +1,19 @@
+# Define report sections (in order of appearance)
+section_types = [
+    'cover',
+    'fiat',
+    'transactions',
+    'taxes',
+    'tax-years',
+    'portfolio',
+    'net-worth',
+    'donations',
+]
+
+# Define cost-basis methods (see 'tax/lots.py')
+cost_basis_methods = [
+    'fifo',
+    'lifo',
+    'hifo',
+    'average',
+]
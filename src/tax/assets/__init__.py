@@ -0,0 +1,22 @@
+from .fiat import Fiat
+from .metal import Metal
+from .crypto import Crypto
+from .stocks import Stocks
+
+
+# Define globally ..
+# (1) .. asset classes
+classes = {
+    'Fiat': 'fiat',
+    'Metal': 'metal',
+    'Cryptocurrency': 'crypto',
+    'Stock (derivative)': 'stocks',
+}
+
+# (2) .. asset instances
+instances = {
+    'fiat': Fiat(),
+    'metal': Metal(),
+    'crypto': Crypto(),
+    'stocks': Stocks(),
+}
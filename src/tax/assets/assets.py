@@ -1,128 +1,117 @@
 from datetime import datetime
 
+from ..fixed import amount_decimals, format_fixed, from_fixed, to_fixed
+
 
 class Assets():
-    # Define transaction labels
-    transaction_types = {
-        # (1) Transaction types
-        'buy': 'Kauf',
-        'sell': 'Verkauf',
-        'deposit': 'Einzahlung',
-        'withdrawal': 'Auszahlung',
+    # Define transaction types
+    # (labels are applied when rendering, see `kind_labels` in 'tax/records.py')
+    transaction_types = [
+        'buy',
+        'sell',
+        'deposit',
+        'withdrawal',
+    ]
 
-        # (2) Transfer types
-        'incoming': 'Empfangen',
-        'outgoing': 'Versendet',
-    }
 
+    # Define decimals of asset amounts
+    decimals = 6
 
-    def extract_assets(self, csv_data: list, asset_list: list) -> tuple:
-        # Create data array
-        result = []
+
+    def sum_assets(self, csv_data: list, totals: dict) -> int:
+        '''Adds amounts to running totals (of assets listed there, in integer units), returning cents of `fiat` paid'''
 
         # Determine amount of `fiat` paid for assets
-        fiat_paid = 0.00
+        fiat_paid = 0
 
-        for asset in asset_list:
-            amount = 0.00
+        for item in csv_data:
+            # Skip non-compliant assets
+            if item['Asset'] not in totals:
+                continue
 
-            for item in csv_data:
-                # Skip non-compliant assets
-                if item['Asset'] != asset:
-                    continue
+            # Gather transactions
+            asset = item['Asset']
+            transaction = item['Transaction Type']
 
-                # Normalize values
-                # (1) Asset amount
-                if item['Amount Asset'] == '-':
-                    item['Amount Asset'] = '0.00'
+            # (1) Buying
+            if transaction == 'buy':
+                totals[asset] += to_fixed(item['Amount Fiat'], self.decimals)
+                fiat_paid -= to_fixed(item['Amount Fiat'], amount_decimals)
 
-                # (2) Fee
-                if item['Fee'] == '-':
-                    item['Fee'] = '0.00'
+            # (2) Selling
+            elif transaction == 'sell':
+                totals[asset] -= to_fixed(item['Amount Fiat'], self.decimals)
+                fiat_paid += to_fixed(item['Amount Fiat'], amount_decimals)
 
-                # Gather transactions
-                transaction = item['Transaction Type']
+            # (3) Depositing
+            elif transaction == 'deposit':
+                totals[asset] += to_fixed(item['Amount Fiat'], self.decimals)
 
-                # (1) Buying
-                if transaction == 'buy':
-                    amount += float(item['Amount Fiat'])
-                    fiat_paid -= float(item['Amount Fiat'])
+            # (4) Withdrawing
+            elif transaction == 'withdrawal':
+                totals[asset] -= to_fixed(item['Amount Fiat'], self.decimals)
 
-                # (2) Selling
-                if transaction == 'sell':
-                    amount -= float(item['Amount Fiat'])
-                    fiat_paid += float(item['Amount Fiat'])
+            # (5) Transfering
+            elif transaction == 'transfer':
+                pass
 
-                # (3) Depositing
-                if transaction == 'deposit':
-                    amount += float(item['Amount Fiat'])
+            # Take fees into account (skipping missing ones, eg '-' or NaN)
+            fee = to_fixed(item['Fee'], self.decimals)
 
-                # (4) Withdrawing
-                if transaction == 'withdrawal':
-                    amount -= float(item['Amount Fiat'])
+            if fee > 0:
+                totals[asset] -= fee
 
-                # (5) Transfering
-                if transaction == 'transfer':
-                    pass
+        return fiat_paid
 
-                # Take fees into account
-                if float(item['Fee']) >= 0.00:
-                    amount -= float(item['Fee'])
 
-            # Format asset amount
-            amount = '{:.6f}'.format(amount)
+    def format_assets(self, totals: dict) -> list:
+        # Create data array
+        result = []
 
+        for asset in sorted(totals.keys()):
             # If everything checks out ..
-            if float(amount) > 0:
-                # .. add asset
+            if totals[asset] > 0:
+                # .. add asset (formatting integer units exactly)
                 result.append({
                     'asset': asset,
-                    'amount': amount,
+                    'amount': format_fixed(totals[asset], self.decimals),
                 })
 
-        return (result, fiat_paid)
+        return result
 
 
-    def calculate_taxes(self, asset: str, balance_taxes: list) -> list:
-        # Set initial values
-        year_sold = ''
-        to_pay = 0
+    def extract_assets(self, csv_data: list, asset_list: list) -> tuple:
+        # Start totals from scratch
+        totals = dict.fromkeys(asset_list, 0)
 
-        # Create buffer
-        buffer = ''
+        # Extract asset amounts & paid amount of `fiat`
+        fiat_paid = self.sum_assets(csv_data, totals)
 
-        # Create data array
-        taxes = []
+        return (self.format_assets(totals), fiat_paid)
 
-        for item in balance_taxes:
-            buffer = item['Asset']
 
-            if item['Asset'][-1] == '*':
-                buffer = item['Asset'][:-1]
+    def is_taxable(self, days: int) -> bool:
+        '''Checks whether sale is taxable (given its holding period)'''
 
-            if asset != buffer:
-                continue
+        # Tax-free after holding period of one year
+        return days <= 365
 
-            if int(item['HODL']) <= 365:
-                if item['Jahr'] == year_sold:
-                    to_pay += float(item['winLoss'])
-                    continue
 
-                if to_pay != 0:
-                    taxes.append({
-                        'Asset': item['Asset'],
-                        'Verkaufsjahr': year_sold,
-                        'Betrag': to_pay,
-                    })
+    def calculate_taxes(self, asset: str, tax_sums: dict) -> list:
+        '''Lists wins & losses (per year of sale), given as cents'''
 
-                year_sold = item['Jahr']
-                to_pay = float(item['winLoss'])
+        # Create data array
+        taxes = []
+
+        for year, to_pay in tax_sums.items():
+            # Skip years without wins or losses
+            if to_pay == 0:
+                continue
 
-        if to_pay != 0:
             taxes.append({
-                'Asset': item['Asset'],
-                'Verkaufsjahr': year_sold,
-                'Betrag': to_pay,
+                'Asset': asset,
+                'Verkaufsjahr': year,
+                'Betrag': from_fixed(to_pay, amount_decimals),
             })
 
         return taxes
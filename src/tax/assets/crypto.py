@@ -4,21 +4,21 @@ from .assets import Assets
 class Crypto(Assets):
     def process_transaction(self, item: dict) -> tuple:
         # Set defaults
-        transaction_type = 'unbekannt'
+        transaction_type = 'unknown'
 
         # Classify each transaction
         # (1) Transfers
         if item['Transaction Type'] == 'transfer':
-            transaction_type = 'erhalten'
+            transaction_type = 'received'
 
             if item['Asset'] == 'BEST':
-                transaction_type = 'Rewards'
+                transaction_type = 'rewards'
 
             direction = 'in'
 
         # (2) Purchases & sales, deposits & withdrawals
         if item['Transaction Type'] in self.transaction_types:
-            transaction_type = self.transaction_types[item['Transaction Type']]
+            transaction_type = item['Transaction Type']
 
             if item['Transaction Type'] in ['buy', 'deposit']:
                 direction = 'in'
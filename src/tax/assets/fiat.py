@@ -1,83 +1,66 @@
 from .assets import Assets
+from ..fixed import to_fixed
 
 
 class Fiat(Assets):
-    def extract_assets(self, csv_data: list, asset_list: list) -> tuple:
-        # Create data array
-        result = []
+    # Define decimals of currency amounts
+    decimals = 2
 
-        fiat_paid = 0.00
 
-        for asset in asset_list:
-            amount = 0.00
+    def sum_assets(self, csv_data: list, totals: dict) -> int:
+        for item in csv_data:
+            # Skip non-compliant assets
+            if item['Asset'] not in totals:
+                continue
 
-            for item in csv_data:
-                # Skip non-compliant assets
-                if item['Asset'] != asset:
-                    continue
+            # Gather transactions
+            asset = item['Asset']
+            transaction = item['Transaction Type']
 
-                # Normalize values
-                # (1) Fiat amount
-                if item['Amount Fiat'] == '-':
-                    item['Amount Fiat'] = '0.00'
+            # Convert amounts to cents (once per row)
+            amount = to_fixed(item['Amount Fiat'], self.decimals)
+            fee = to_fixed(item['Fee'], self.decimals)
 
-                # (2) Fee
-                if item['Fee'] == '-':
-                    item['Fee'] = '0.00'
+            # (1) Buying
+            if transaction == 'buy':
+                totals[asset] += amount
 
-                # Gather transactions
-                transaction = item['Transaction Type']
+            # (2) Selling
+            elif transaction == 'sell':
+                totals[asset] -= amount
 
-                # (1) Buying
-                if transaction == 'buy':
-                    amount += float(item['Amount Fiat'])
+            # (3) Depositing
+            elif transaction == 'deposit':
+                totals[asset] += amount
 
-                # (2) Selling
-                if transaction == 'sell':
-                    amount -= float(item['Amount Fiat'])
+            # (4) Withdrawing
+            elif transaction == 'withdrawal':
+                totals[asset] -= amount
 
-                # (3) Depositing
-                if transaction == 'deposit':
-                    amount += float(item['Amount Fiat'])
+            # (5) Transfering
+            elif transaction == 'transfer':
+                if item['In/Out'] == 'outgoing':
+                    totals[asset] -= amount
 
-                # (4) Withdrawing
-                if transaction == 'withdrawal':
-                    amount -= float(item['Amount Fiat'])
+                if item['In/Out'] == 'incoming':
+                    totals[asset] += amount
 
-                # (5) Transfering
-                if transaction == 'transfer':
-                    if item['In/Out'] == 'outgoing':
-                        amount -= float(item['Amount Fiat'])
+            # Take fees into account
+            if fee >= 0:
+                totals[asset] -= fee
 
-                    if item['In/Out'] == 'incoming':
-                        amount += float(item['Amount Fiat'])
-
-                # Take fees into account
-                if float(item['Fee']) >= 0.00:
-                    amount -= float(item['Fee'])
-
-            # Format asset amount
-            amount = '{:.2f}'.format(amount)
-
-            # If everything checks out ..
-            if float(amount) > 0:
-                # .. add asset
-                result.append({
-                    'asset': asset,
-                    'amount': amount,
-                })
-
-        return (result, fiat_paid)
+        # Currencies are not paid for
+        return 0
 
 
     def process_transaction(self, item: dict) -> tuple:
         # Set defaults
-        transaction_type = 'unbekannt'
+        transaction_type = 'unknown'
 
         # Classify each transaction
         # (1) Transfers
         if item['Transaction Type'] == 'transfer':
-            transaction_type = self.transaction_types[item['In/Out']]
+            transaction_type = item['In/Out']
 
             if item['In/Out'] == 'incoming':
                 direction = 'in'
@@ -87,7 +70,7 @@ class Fiat(Assets):
 
         # (2) Purchases & sales, deposits & withdrawals
         if item['Transaction Type'] in self.transaction_types:
-            transaction_type = self.transaction_types[item['Transaction Type']]
+            transaction_type = item['Transaction Type']
 
             if item['Transaction Type'] in ['buy', 'deposit']:
                 direction = 'in'
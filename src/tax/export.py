@@ -0,0 +1,154 @@
+import csv
+import html
+import math
+
+from .records import as_dict
+from ..utils import dump_json
+
+
+# Define globally ..
+# (1) .. exported data structures
+structures = ['wealth', 'transactions', 'balance', 'taxes', 'portfolio']
+
+# (2) .. supported file formats
+formats = ['csv', 'json', 'xlsx', 'html']
+
+
+def get_tables(data: dict) -> dict:
+    '''Flattens computed data structures into tables (one per structure)'''
+
+    # Create data array
+    tables = {}
+
+    for name in structures:
+        rows = []
+
+        for mode, items in data[name].items():
+            # Use combined incoming/outgoing transactions
+            if name == 'transactions':
+                items = items['all']
+
+            for item in items:
+                rows.append(dict({'Anlageklasse': mode}, **as_dict(item)))
+
+        # Determine columns (in order of appearance)
+        columns = []
+
+        for row in rows:
+            for column in row.keys():
+                if column not in columns:
+                    columns.append(column)
+
+        tables[name] = (columns, rows)
+
+    return tables
+
+
+def normalize(value):
+    '''Converts missing values (as returned by `pandas`) to `None`'''
+
+    if isinstance(value, float) and math.isnan(value):
+        return None
+
+    return value
+
+
+def export_csv(data: dict, output_file: str) -> None:
+    # Write one CSV file per table
+    for name, (columns, rows) in get_tables(data).items():
+        with open('{}-{}.csv'.format(output_file, name), 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=columns, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def export_json(data: dict, output_file: str) -> None:
+    # Create data array
+    result = {}
+
+    for name in structures:
+        result[name] = {}
+
+        for mode, items in data[name].items():
+            # Use combined incoming/outgoing transactions
+            if name == 'transactions':
+                items = items['all']
+
+            result[name][mode] = [{key: normalize(value) for key, value in as_dict(item).items()} for item in items]
+
+    dump_json(result, '{}.json'.format(output_file))
+
+
+def export_xlsx(data: dict, output_file: str) -> None:
+    # Import dependency
+    try:
+        from openpyxl import Workbook
+
+    except ImportError:
+        raise Exception('Exporting XLSX files requires "openpyxl"')
+
+    # Create workbook (in write-only mode for speed)
+    workbook = Workbook(write_only=True)
+
+    # Add one worksheet per table
+    for name, (columns, rows) in get_tables(data).items():
+        sheet = workbook.create_sheet(name)
+        sheet.append(columns)
+
+        for row in rows:
+            sheet.append([normalize(row.get(column)) for column in columns])
+
+    workbook.save('{}.xlsx'.format(output_file))
+
+
+def export_html(data: dict, output_file: str, title: str = 'Bitpanda Report') -> None:
+    # Create document
+    lines = [
+        '<!DOCTYPE html>',
+        '<html lang="de">',
+        '<head><meta charset="utf-8"><title>{}</title></head>'.format(html.escape(title)),
+        '<body>',
+        '<h1>{}</h1>'.format(html.escape(title)),
+    ]
+
+    # Add one table per data structure
+    for name, (columns, rows) in get_tables(data).items():
+        lines.append('<h2>{}</h2>'.format(html.escape(name)))
+        lines.append('<table>')
+        lines.append('<tr>{}</tr>'.format(''.join('<th>{}</th>'.format(html.escape(column)) for column in columns)))
+
+        for row in rows:
+            cells = []
+
+            for column in columns:
+                value = normalize(row.get(column))
+                cells.append('<td>{}</td>'.format('' if value is None else html.escape(str(value))))
+
+            lines.append('<tr>{}</tr>'.format(''.join(cells)))
+
+        lines.append('</table>')
+
+    lines.append('</body>')
+    lines.append('</html>')
+
+    with open('{}.html'.format(output_file), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines))
+
+
+def export_data(data: dict, output_file: str, file_format: str, title: str = 'Bitpanda Report') -> None:
+    '''Exports computed data structures in given file format'''
+
+    if file_format == 'csv':
+        export_csv(data, output_file)
+
+    elif file_format == 'json':
+        export_json(data, output_file)
+
+    elif file_format == 'xlsx':
+        export_xlsx(data, output_file)
+
+    elif file_format == 'html':
+        export_html(data, output_file, title)
+
+    else:
+        raise Exception('Unsupported file format "{}"'.format(file_format))
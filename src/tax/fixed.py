@@ -0,0 +1,79 @@
+from decimal import Decimal, ROUND_HALF_EVEN
+from functools import lru_cache
+
+
+# Define globally ..
+# (1) .. decimals of amounts (cents) & quantities (micro-units)
+amount_decimals = 2
+quantity_decimals = 6
+
+# (2) .. scale factors (per number of decimals)
+scales = {decimals: 10 ** decimals for decimals in range(9)}
+
+
+@lru_cache(maxsize=65536)
+def parse_fixed(value: str, decimals: int) -> int:
+    # Convert strings exactly (caching them, as eg fees repeat a lot)
+    if value == '-' or value == '':
+        return 0
+
+    return int((Decimal(value) * scales[decimals]).to_integral_value(ROUND_HALF_EVEN))
+
+
+def to_fixed(value, decimals: int) -> int:
+    '''Converts value (number or CSV string) to integer units, treating missing values ('-' or NaN) as zero'''
+
+    # Floats already are approximations ..
+    if type(value) is float:
+        return round(value * scales[decimals]) if value == value else 0
+
+    # .. unlike strings
+    if type(value) is str:
+        return parse_fixed(value, decimals)
+
+    if value is None:
+        return 0
+
+    return round(value * scales[decimals])
+
+
+def to_cents(value) -> int:
+    return to_fixed(value, amount_decimals)
+
+
+def to_micros(value) -> int:
+    return to_fixed(value, quantity_decimals)
+
+
+def from_fixed(value: int, decimals: int) -> float:
+    '''Converts integer units back to float (at boundaries, eg for charts & exports)'''
+
+    return value / scales[decimals]
+
+
+def format_fixed(value: int, decimals: int) -> str:
+    '''Formats integer units (exactly, unlike formatting floats)'''
+
+    integer, fraction = divmod(abs(value), scales[decimals])
+
+    if decimals == 0:
+        return '{}{}'.format('-' if value < 0 else '', integer)
+
+    return '{}{}.{:0{}d}'.format('-' if value < 0 else '', integer, fraction, decimals)
+
+
+def divide(numerator: int, denominator: int) -> int:
+    '''Divides integers, rounding half to even (same as `round`)'''
+
+    quotient, remainder = divmod(numerator, denominator)
+
+    if remainder * 2 > denominator or (remainder * 2 == denominator and quotient % 2):
+        quotient += 1
+
+    return quotient
+
+
+def get_value(units: int, price: int) -> int:
+    '''Determines value of quantity (in micro-units) at given price (in cents), rounded to cents'''
+
+    return divide(units * price, scales[quantity_decimals])
@@ -0,0 +1,129 @@
+import os
+import pickle
+from bisect import bisect_right
+from datetime import date, time, timedelta
+
+from .fixed import from_fixed, quantity_decimals
+
+
+# Define globally ..
+# (1) .. index format (bumped whenever its structure changes)
+index_version = 1
+
+# (2) .. holding period, after which sales are tax-free (see `Assets.is_taxable`)
+holding_period = timedelta(days=366)
+
+
+def get_tax_free_date(purchase) -> date:
+    '''Determines first day on which lot may be sold tax-free (all day long)'''
+
+    moment = purchase + holding_period
+
+    # Round up to next day (unless bought at midnight)
+    if moment.time() == time(0):
+        return moment.date()
+
+    return moment.date() + timedelta(days=1)
+
+
+class TaxFreeIndex:
+    '''Open lots (per asset class & asset), sorted by date on which they become tax-free'''
+
+    __slots__ = ('assets',)
+
+
+    def __init__(self) -> None:
+        # Create data array, holding (per asset class & asset) ..
+        # (1) .. tax-free dates (as ordinals, in ascending order)
+        # (2) .. running totals of quantities (in micro-units, starting at zero)
+        # (3) .. quantities never becoming tax-free (eg of stocks)
+        self.assets = {}
+
+
+    def add_lots(self, mode: str, asset: str, lots, tax_free: bool = True) -> None:
+        # Skip empty positions
+        lots = [lot for lot in lots if lot.units > 0]
+
+        if not lots:
+            return
+
+        # If asset class is always taxable ..
+        if not tax_free:
+            # .. only keep total quantity
+            self.assets[(mode, asset)] = ([], [0], sum(lot.units for lot in lots))
+
+            return
+
+        # Sort lots (by tax-free date)
+        entries = sorted((get_tax_free_date(lot.transaction.date).toordinal(), lot.units) for lot in lots)
+
+        # Sum up quantities (so that any date takes one binary search)
+        totals = [0]
+
+        for _, units in entries:
+            totals.append(totals[-1] + units)
+
+        self.assets[(mode, asset)] = ([ordinal for ordinal, _ in entries], totals, 0)
+
+
+    def query(self, day: date, asset_class: str = None) -> list:
+        '''Determines holdings (per asset class & asset), split by whether they may be sold tax-free on given day'''
+
+        # Create data array
+        result = []
+
+        for (mode, asset), (dates, totals, taxable) in sorted(self.assets.items()):
+            if asset_class and mode != asset_class:
+                continue
+
+            # Find lots becoming tax-free until given day
+            index = bisect_right(dates, day.toordinal())
+
+            result.append({
+                'asset_class': mode,
+                'asset': asset,
+                'quantity': from_fixed(totals[-1] + taxable, quantity_decimals),
+                'tax_free': from_fixed(totals[index], quantity_decimals),
+                'taxable': from_fixed(totals[-1] - totals[index] + taxable, quantity_decimals),
+                'next_tax_free': str(date.fromordinal(dates[index])) if index < len(dates) else None,
+            })
+
+        return result
+
+
+def get_index_file(checkpoint_file: str) -> str:
+    '''Determines index file (next to checkpoint)'''
+
+    return '{}.index.pickle'.format(os.path.splitext(checkpoint_file)[0])
+
+
+def load_index(checkpoint_file: str) -> TaxFreeIndex:
+    '''Loads index stored alongside checkpoint (`None` if missing or outdated)'''
+
+    index_file = get_index_file(checkpoint_file)
+
+    if not os.path.exists(index_file):
+        return None
+
+    try:
+        with open(index_file, 'rb') as file:
+            version, index = pickle.load(file)
+
+    except (pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+        return None
+
+    return index if version == index_version else None
+
+
+def save_index(index: TaxFreeIndex, checkpoint_file: str) -> None:
+    '''Stores index alongside checkpoint'''
+
+    index_file = get_index_file(checkpoint_file)
+
+    # Write to temporary file first (so interrupted runs keep previous index)
+    temp_file = '{}.tmp'.format(index_file)
+
+    with open(temp_file, 'wb') as file:
+        pickle.dump((index_version, index), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temp_file, index_file)
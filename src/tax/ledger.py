@@ -0,0 +1,344 @@
+import os
+import heapq
+import pickle
+import logging
+from operator import itemgetter
+
+import click
+
+from .assets import classes, instances
+from .fixed import amount_decimals, format_fixed, from_fixed, get_value, to_cents, to_micros
+from .index import TaxFreeIndex, holding_period, save_index
+from .lots import methods as lot_methods
+from .prices import assign_cost_basis
+from .records import Lot, has_cost_basis
+from ..logs import logger
+from ..utils import create_path, slugify
+
+
+# Define globally ..
+# (1) .. checkpoint format (bumped whenever ledger structure changes)
+checkpoint_version = 5
+
+# (2) .. asset classes matched against lots
+lot_classes = ['metal', 'crypto', 'stocks']
+
+
+class Position:
+    '''Lots & running totals of single asset (as matched so far, using given cost-basis method)'''
+
+    __slots__ = ('lots', 'balance', 'buffer', 'hint', 'tax_sums')
+
+
+    def __init__(self, method: str = 'fifo') -> None:
+        # Create lots from incoming transactions
+        self.lots = lot_methods[method]()
+
+        # Set initial values (in cents)
+        self.balance = 0
+        self.buffer = 0
+
+        # Keep track of transfers (received without known cost basis)
+        self.hint = False
+
+        # Sum up wins & losses (in cents, per year of sale)
+        self.tax_sums = {}
+
+
+    def add(self, item) -> None:
+        if not has_cost_basis(item):
+            self.hint = True
+
+        # Convert quantities to micro-units & amounts to cents
+        self.lots.add(Lot(item, to_micros(item.quantity), to_cents(item.amount)))
+
+
+    def match(self, item) -> tuple:
+        '''Matches outgoing transaction against lots (in order of cost-basis method), returning holding period & win/loss (in cents)'''
+
+        lots = self.lots
+        asset_balance = 0
+
+        # Determine holding period (since lot matched first)
+        days = (item.date - lots.first().transaction.date).days if lots else 0
+
+        # Convert values (same as lots), so that they compare exactly
+        quantity = to_micros(item.quantity)
+        amount = to_cents(item.amount)
+        price = to_cents(item.price)
+
+        if quantity == 0:
+            quantity = to_micros(item.fee)
+
+        if lots:
+            if quantity > lots.first().units:
+                while quantity > lots.first().units:
+                    units = lots.first().units
+                    cost = lots.take(units)
+
+                    if item.kind == 'sell':
+                        self.buffer += get_value(units, price) - cost
+
+                    quantity -= units
+                    amount = get_value(quantity, price)
+
+                    if not lots:
+                        break
+
+                asset_balance += self.buffer
+
+            # Match (remaining) quantity against (part of) next lot
+            if lots:
+                cost = lots.take(quantity)
+
+                if item.kind == 'sell':
+                    asset_balance += amount - cost
+
+        self.balance += asset_balance
+
+        return (days, asset_balance)
+
+
+class Ledger:
+    '''Running asset totals & lots (per cost-basis method), which may be resumed with newer rows'''
+
+    def __init__(self, methods: list = None) -> None:
+        # Determine cost-basis methods (the first one being reported, others computed alongside)
+        self.methods = methods or ['fifo']
+
+        for method in self.methods:
+            if method not in lot_methods:
+                raise Exception('Unknown cost-basis method "{}"'.format(method))
+
+        # Keep track of last processed transaction (& all others sharing its timestamp)
+        self.last_id = None
+        self.last_timestamp = None
+        self.last_ids = set()
+
+        # Create data arrays
+        # (1) Asset totals (in integer units) & cents of `fiat` paid (per asset class)
+        self.totals = {mode: {} for mode in instances.keys()}
+        self.fiat_paid = {mode: 0 for mode in instances.keys()}
+
+        # (2) Positions (per cost-basis method, asset class & asset)
+        self.positions = {method: {mode: {} for mode in lot_classes} for method in self.methods}
+
+
+    def get_new_rows(self, rows: list):
+        '''Determines rows not processed yet (`None` if rows don't continue ledger)'''
+
+        # If nothing was processed yet ..
+        if self.last_id is None:
+            # .. every row is new
+            return rows
+
+        # Make sure rows contain last processed transaction (eg export of same account)
+        if not any(item['Transaction ID'] == self.last_id and item['Timestamp'] == self.last_timestamp for item in rows):
+            return None
+
+        # Keep rows after last processed timestamp, along with those sharing it (unless processed already)
+        return [item for item in rows if item['Timestamp'] > self.last_timestamp or (item['Timestamp'] == self.last_timestamp and item['Transaction ID'] not in self.last_ids)]
+
+
+    def add_rows(self, rows: list) -> None:
+        # Register assets (per asset class)
+        for item in rows:
+            # Skip unknown asset classes
+            if item['Asset class'] not in classes:
+                continue
+
+            self.totals[classes[item['Asset class']]].setdefault(item['Asset'], 0)
+
+        # Add up asset totals & paid amount of `fiat`
+        for mode, obj in instances.items():
+            self.fiat_paid[mode] += obj.sum_assets(rows, self.totals[mode])
+
+        # Keep track of last processed transaction
+        for item in rows:
+            if self.last_timestamp is None or item['Timestamp'] > self.last_timestamp:
+                self.last_ids = set()
+
+            if self.last_timestamp is None or item['Timestamp'] >= self.last_timestamp:
+                self.last_id, self.last_timestamp = item['Transaction ID'], item['Timestamp']
+                self.last_ids.add(self.last_id)
+
+
+    def get_position(self, method: str, mode: str, asset: str) -> Position:
+        positions = self.positions[method][mode]
+
+        if asset not in positions:
+            positions[asset] = Position(method)
+
+        return positions[asset]
+
+
+    def add_transactions(self, transactions: dict, prices=None) -> list:
+        '''Adds transactions (to all cost-basis methods at once), returning matched sales of first one (asset class, transaction, holding period, win/loss in cents, taxability)'''
+
+        # Create data array
+        sales = []
+
+        # If price store is available ..
+        if prices is not None:
+            # .. value transfers lacking cost basis (all at once, before creating lots)
+            transfers = [item for mode in lot_classes for item in transactions[mode]['in'] if not has_cost_basis(item)]
+            count = assign_cost_basis(transfers, prices)
+
+            logger.debug('Valued %d of %d transfers using price store', count, len(transfers), extra={'stage': 'calculate_margins'})
+
+        # Check log level once (rather than per sale)
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        for mode in lot_classes:
+            # Go through transactions in chronological order (adding incoming ones before matching outgoing ones of same time)
+            incoming = ((item.date, 0, item) for item in transactions[mode]['in'])
+            outgoing = ((item.date, 1, item) for item in transactions[mode]['out'])
+
+            for _, direction, item in heapq.merge(incoming, outgoing, key=itemgetter(0, 1)):
+                # Create lots from incoming transactions ..
+                if direction == 0:
+                    for method in self.methods:
+                        self.get_position(method, mode, item.asset).add(item)
+
+                    continue
+
+                # .. and match outgoing ones against them
+                for method in self.methods:
+                    position = self.get_position(method, mode, item.asset)
+                    days, asset_balance = position.match(item)
+
+                    taxable = instances[mode].is_taxable(days)
+
+                    # Sum up taxable wins & losses
+                    if taxable:
+                        position.tax_sums[item.date.year] = position.tax_sums.get(item.date.year, 0) + asset_balance
+
+                    # Report sales of first method only
+                    if method == self.methods[0]:
+                        sales.append((mode, item, days, asset_balance, taxable))
+
+                        if debug:
+                            logger.debug('%s %s %s (%s): %d days, %.2f', mode, item.kind, item.asset, item.date, days, from_fixed(asset_balance, amount_decimals), extra={'stage': 'calculate_margins'})
+
+        return sales
+
+
+    def get_assets(self) -> dict:
+        # Sort assets (by name)
+        return {mode: sorted(totals.keys()) for mode, totals in self.totals.items()}
+
+
+    def get_margins(self, assets: dict, method: str = None) -> tuple:
+        # Use first cost-basis method (unless specified otherwise)
+        method = method or self.methods[0]
+
+        # Create data arrays
+        balance = {mode: [] for mode in lot_classes}
+        taxes = {mode: [] for mode in lot_classes}
+        portfolio = {mode: [] for mode in lot_classes}
+
+        for mode in lot_classes:
+            for asset in assets[mode]:
+                position = self.positions[method][mode].get(asset, Position(method))
+
+                # Add remaining lots to portfolio
+                for lot in position.lots:
+                    if lot.units > 0:
+                        portfolio[mode].append(lot)
+
+                balance[mode].append({
+                    'Asset': asset,
+                    'winLoss': format_fixed(position.balance, amount_decimals),
+                })
+
+                if position.balance != 0:
+                    taxes[mode] = instances[mode].calculate_taxes('{}*'.format(asset) if position.hint else asset, position.tax_sums)
+
+                else:
+                    taxes[mode].append({
+                        'Asset': asset,
+                        'Verkaufsjahr': 1990,
+                        'Betrag': 0.00,
+                    })
+
+            # Sort taxes (by date of purchase & asset name)
+            taxes[mode].sort(key=itemgetter('Verkaufsjahr', 'Asset'))
+
+        return (balance, taxes, portfolio)
+
+
+    def get_comparison(self) -> dict:
+        '''Sums up taxable wins & losses (in cents, per cost-basis method, asset class & year of sale)'''
+
+        # Create data array
+        comparison = {method: {mode: {} for mode in lot_classes} for method in self.methods}
+
+        for method, positions in self.positions.items():
+            for mode, assets in positions.items():
+                sums = comparison[method][mode]
+
+                for position in assets.values():
+                    for year, tax_sum in position.tax_sums.items():
+                        sums[year] = sums.get(year, 0) + tax_sum
+
+        return comparison
+
+
+    def get_tax_free_index(self, method: str = None) -> TaxFreeIndex:
+        '''Indexes open lots (of first cost-basis method, unless specified otherwise) by date they become tax-free'''
+
+        index = TaxFreeIndex()
+
+        for mode, positions in self.positions[method or self.methods[0]].items():
+            # Determine whether holding period applies (eg not for stocks)
+            tax_free = not instances[mode].is_taxable(holding_period.days)
+
+            for asset, position in positions.items():
+                index.add_lots(mode, asset, position.lots, tax_free)
+
+        return index
+
+
+def get_checkpoint_file(name: str) -> str:
+    '''Determines checkpoint file (inside app directory)'''
+
+    return os.path.join(click.get_app_dir('bitpanda'), 'checkpoints', '{}.pickle'.format(slugify(name)))
+
+
+def load_checkpoint(name: str, methods: list = None) -> Ledger:
+    '''Loads ledger from checkpoint (starting over if missing, outdated or using other cost-basis methods)'''
+
+    checkpoint_file = get_checkpoint_file(name)
+
+    if os.path.exists(checkpoint_file):
+        try:
+            with open(checkpoint_file, 'rb') as file:
+                version, ledger = pickle.load(file)
+
+            if version == checkpoint_version and ledger.methods == (methods or ['fifo']):
+                return ledger
+
+        except (pickle.UnpicklingError, EOFError, ValueError, AttributeError):
+            pass
+
+    return Ledger(methods)
+
+
+def save_checkpoint(ledger: Ledger, name: str) -> None:
+    '''Stores ledger as checkpoint (inside app directory)'''
+
+    checkpoint_file = get_checkpoint_file(name)
+
+    if not create_path(os.path.dirname(checkpoint_file)):
+        raise Exception('Unable to create checkpoint directory "{}"'.format(os.path.dirname(checkpoint_file)))
+
+    # Write to temporary file first (so interrupted runs keep previous checkpoint)
+    temp_file = '{}.tmp'.format(checkpoint_file)
+
+    with open(temp_file, 'wb') as file:
+        pickle.dump((checkpoint_version, ledger), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temp_file, checkpoint_file)
+
+    # Store index of open lots (answering queries without loading whole ledger)
+    save_index(ledger.get_tax_free_index(), checkpoint_file)
@@ -0,0 +1,158 @@
+import heapq
+from collections import deque
+from operator import itemgetter
+
+from .fixed import divide, get_value, to_cents
+
+
+class FirstInFirstOut:
+    '''Open lots of single asset, matched oldest first (using deque)'''
+
+    __slots__ = ('items',)
+
+
+    def __init__(self) -> None:
+        self.items = deque()
+
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+    def __iter__(self):
+        # Iterate over lots (in chronological order)
+        return iter(self.items)
+
+
+    def add(self, lot) -> None:
+        self.items.append(lot)
+
+
+    def first(self):
+        '''Determines lot being matched next'''
+
+        return self.items[0]
+
+
+    def remove(self) -> None:
+        self.items.popleft()
+
+
+    def take(self, units: int) -> int:
+        '''Takes quantity (in micro-units) from lot being matched next, returning its cost (in cents)'''
+
+        lot = self.first()
+
+        # Use up whole lot ..
+        if units >= lot.units:
+            self.remove()
+
+            return lot.cents
+
+        # .. or part of it (at its purchase price)
+        lot_price = to_cents(lot.transaction.price)
+
+        lot.units -= units
+        lot.cents = get_value(lot.units, lot_price)
+
+        return get_value(units, lot_price)
+
+
+class LastInFirstOut(FirstInFirstOut):
+    '''Open lots of single asset, matched newest first (using stack)'''
+
+    __slots__ = ()
+
+
+    def __init__(self) -> None:
+        self.items = []
+
+
+    def first(self):
+        return self.items[-1]
+
+
+    def remove(self) -> None:
+        self.items.pop()
+
+
+class HighestInFirstOut(FirstInFirstOut):
+    '''Open lots of single asset, matched most expensive first (using heap keyed on unit price)'''
+
+    __slots__ = ('count',)
+
+
+    def __init__(self) -> None:
+        self.items = []
+
+        # Count lots (so that equal prices are matched oldest first)
+        self.count = 0
+
+
+    def __iter__(self):
+        return (lot for _, _, lot in sorted(self.items, key=itemgetter(1)))
+
+
+    def add(self, lot) -> None:
+        self.count += 1
+
+        heapq.heappush(self.items, (-to_cents(lot.transaction.price), self.count, lot))
+
+
+    def first(self):
+        return self.items[0][2]
+
+
+    def remove(self) -> None:
+        heapq.heappop(self.items)
+
+
+class AverageCost(FirstInFirstOut):
+    '''Open lots of single asset, matched oldest first (for holding periods) at average cost (using running totals)'''
+
+    __slots__ = ('units', 'cents')
+
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        # Keep track of total quantity (in micro-units) & cost (in cents)
+        self.units = 0
+        self.cents = 0
+
+
+    def add(self, lot) -> None:
+        super().add(lot)
+
+        self.units += lot.units
+        self.cents += lot.cents
+
+
+    def take(self, units: int) -> int:
+        lot = self.first()
+
+        # Determine share of total cost
+        cost = divide(self.cents * units, self.units) if self.units > 0 else 0
+
+        self.units -= units
+        self.cents -= cost
+
+        # Use up whole lot ..
+        if units >= lot.units:
+            self.remove()
+
+        # .. or part of it (keeping its share of cost)
+        else:
+            lot.cents = divide(lot.cents * (lot.units - units), lot.units)
+            lot.units -= units
+
+        return cost
+
+
+# Define cost-basis methods (by name)
+methods = {
+    'fifo': FirstInFirstOut,
+    'lifo': LastInFirstOut,
+    'hifo': HighestInFirstOut,
+    'average': AverageCost,
+}
@@ -0,0 +1,59 @@
+import sys
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def get_peak_rss() -> int:
+    '''Determines peak resident set size of current process (in bytes, if available)'''
+
+    # Import dependency
+    try:
+        import resource
+
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # macOS reports bytes, Linux kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Metrics:
+    '''Collects wall time, CPU time & peak RSS (plus eg row counts) per stage'''
+
+    def __init__(self) -> None:
+        # Identify run (as metrics of multiple runs may end up in same file)
+        self.run = datetime.now().isoformat(timespec='seconds')
+
+        # Create data array
+        self.records = []
+
+
+    @contextmanager
+    def measure(self, stage: str, **fields):
+        # Create record (to be completed by caller, eg with row counts)
+        record = dict({'stage': stage}, **fields)
+
+        # Start timers
+        wall, cpu = time.perf_counter(), time.process_time()
+
+        try:
+            yield record
+
+        finally:
+            record['wall'] = round(time.perf_counter() - wall, 6)
+            record['cpu'] = round(time.process_time() - cpu, 6)
+            record['peak_rss'] = get_peak_rss()
+
+            self.records.append(record)
+
+
+    def dump(self, output_file: str) -> None:
+        '''Appends records (one JSON object per line) to given file'''
+
+        with open(output_file, 'a') as file:
+            for record in self.records:
+                file.write(json.dumps(dict({'run': self.run}, **record), ensure_ascii=False) + '\n')
@@ -1,11 +1,9 @@
-import os
-import glob
+import io
 from datetime import datetime
 
-import click
 from fpdf import FPDF
 
-from ..utils import create_path, slugify
+from .records import format_value, has_cost_basis
 
 
 # Define globally ..
@@ -22,7 +20,20 @@ class PDF(FPDF):
     date_format = '%d.%m.%Y'
 
 
+    # Page decorations ..
+    # (1) .. header (title)
+    show_header = True
+
+    # (2) .. footer (date & page number)
+    show_footer = True
+
+
     def header(self) -> None:
+        # If disabled ..
+        if not self.show_header:
+            # .. abort execution
+            return
+
         # TODO: Insert logo
         # self.image('fox_face.png', 10, 8, 25)
 
@@ -37,6 +48,11 @@ class PDF(FPDF):
 
 
     def footer(self) -> None:
+        # If disabled ..
+        if not self.show_footer:
+            # .. abort execution
+            return
+
         # Set footer position
         self.set_y(-15)
 
@@ -80,21 +96,13 @@ class Document:
         # (4) Set document title
         self.pdf.set_title(title)
 
-        # Define temporary directory
-        # (1) Determine application home
-        self.app_dir = click.get_app_dir('bitpanda')
-
-        # (2) Attempt to create directory ..
-        if not create_path(self.app_dir):
-            # .. otherwise raise exception
-            raise Exception('Unable to create app_dir "{}"'.format(self.app_dir))
-
 
     def add_cover_page(self, assets: dict, wealth: dict, categories: dict, user_info: dict) -> None:
         # Import dependency
         import matplotlib.pyplot as plt
 
         # Create data array for pie charts
+        # (kept in memory, so concurrent reports don't share any files)
         png_files = {}
 
         # Loop over categories
@@ -121,16 +129,16 @@ class Document:
             # Make it round
             plt.axis('equal')
 
-            # Set filename
-            png_file = os.path.join(self.app_dir, '{}.png'.format(slugify(category)))
+            # Create image buffer
+            png_file = io.BytesIO()
 
             # Create pie chart
             plt.pie(x_list, labels=labels, autopct='%1.1f%%', normalize=True)
             plt.title(category)
-            plt.savefig(png_file, bbox_inches='tight')
+            plt.savefig(png_file, format='png', bbox_inches='tight')
             plt.close()
 
-            # Store filename
+            # Store image
             png_files[mode] = png_file
 
         # Add a page
@@ -264,14 +272,12 @@ class Document:
             # Loop over transactions
             for transaction in transactions:
                 # Skip fiat currencies not currently selected
-                if transaction['Asset'] != asset:
+                if transaction.asset != asset:
                     continue
 
                 # (2) Print table row
-                self.pdf.cell(col_width, th, str(transaction['Datum']), border=1)
-                self.pdf.cell(col_width, th, str(transaction['Transaktion']), border=1)
-                self.pdf.cell(col_width, th, str(transaction['Betrag']), border=1)
-                self.pdf.cell(col_width, th, str(transaction['Gebühren']), border=1)
+                for field in ['date', 'kind', 'amount', 'fee']:
+                    self.pdf.cell(col_width, th, format_value(field, getattr(transaction, field)), border=1)
 
                 self.pdf.ln(th)
 
@@ -316,21 +322,18 @@ class Document:
                 # Loop over transactions
                 for item in transactions[mode]['all']:
                     # Skip assets not currently selected
-                    if item['Asset'] != asset:
+                    if item.asset != asset:
                         continue
 
                     # If assets were transfered over ..
-                    if item['Transaktion'] == 'empfangen':
+                    if not has_cost_basis(item):
                         # .. remember it (to notify about possible inaccuracy later)
                         hint = True
 
                     # (2) Print table row
-                    self.pdf.cell(col_width, th, str(item['Datum']), border=1)
-                    self.pdf.cell(col_width, th, str(item['Transaktion']), border=1)
-                    self.pdf.cell(col_width, th, str(item['Betrag']), border=1)
-                    self.pdf.cell(col_width, th, str(item['Asset Menge']), border=1)
-                    self.pdf.cell(col_width, th, str(item['Asset Preis']), border=1)
-                    self.pdf.cell(col_width, th, str(item['Gebühren']), border=1)
+                    for field in ['date', 'kind', 'amount', 'quantity', 'price', 'fee']:
+                        self.pdf.cell(col_width, th, format_value(field, getattr(item, field)), border=1)
+
                     self.pdf.ln(th)
 
                 for item in balance[mode]:
@@ -532,7 +535,7 @@ class Document:
                 continue
 
             # Gather portfolio
-            asset_portfolio = [item for item in portfolio[mode] if item['Asset'] in [item['asset'] for item in assets[mode]]]
+            asset_portfolio = [lot for lot in portfolio[mode] if lot.transaction.asset in [item['asset'] for item in assets[mode]]]
 
             if not asset_portfolio:
                 continue
@@ -564,10 +567,11 @@ class Document:
             temp_price = 0
             hodl_amount = 0
 
-            for item in asset_portfolio:
-                diftime = today - datetime.strptime(item['Datum'], '%Y-%m-%d %H:%M:%S')
+            for lot in asset_portfolio:
+                item = lot.transaction
+                diftime = today - item.date
 
-                if item['Asset'] != temp_asset:
+                if item.asset != temp_asset:
                     if temp_price > 0:
                         col_width = pdf_width - 30
 
@@ -586,12 +590,12 @@ class Document:
                         self.pdf.cell(col_width, th, 'Durchschnitt Preis: {:.3f}'.format(temp_price / temp_amount), align='R', border=1)
                         self.pdf.ln(th)
 
-                    temp_asset = item['Asset']
+                    temp_asset = item.asset
 
                     col_width = pdf_width - 30
 
                     self.pdf.set_font('times', 'B', 10)
-                    self.pdf.cell(col_width, th, item['Asset'], align='C', border=1)
+                    self.pdf.cell(col_width, th, item.asset, align='C', border=1)
                     self.pdf.set_font('times', '', 9)
                     self.pdf.ln(th)
 
@@ -601,25 +605,23 @@ class Document:
 
                 col_width = (pdf_width - 30) / 6
 
-                self.pdf.cell(col_width, th, str(item['Datum']), border=1)
-                self.pdf.cell(col_width, th, str(item['Transaktion']), border=1)
-                self.pdf.cell(col_width, th, str(item['Betrag']), border=1)
-                self.pdf.cell(col_width, th, str(item['Asset Menge']), border=1)
-                self.pdf.cell(col_width, th, str(item['Asset Preis']), border=1)
+                self.pdf.cell(col_width, th, format_value('date', item.date), border=1)
+                self.pdf.cell(col_width, th, format_value('kind', item.kind), border=1)
+                self.pdf.cell(col_width, th, format_value('amount', lot.amount), border=1)
+                self.pdf.cell(col_width, th, format_value('quantity', lot.quantity), border=1)
+                self.pdf.cell(col_width, th, format_value('price', item.price), border=1)
 
                 if float(diftime.days) > 365:
                     self.pdf.set_text_color(0, 255, 0)
 
-                    hodl_amount += float(item['Asset Menge'])
+                    hodl_amount += lot.quantity
 
                 self.pdf.cell(col_width, th, str(diftime.days), border=1)
                 self.pdf.ln(th)
                 self.pdf.set_text_color(0, 0, 0)
 
-                temp_amount += float(item['Asset Menge'])
-
-                if item['Betrag'] != '':
-                    temp_price += float(item['Betrag'])
+                temp_amount += lot.quantity
+                temp_price += lot.amount
 
             col_width = (pdf_width - 30) / 4
 
@@ -642,6 +644,75 @@ class Document:
                 self.pdf.ln(th)
 
 
+    def add_net_worth_page(self, dates, values: dict, categories: dict) -> None:
+        # Import dependency
+        import matplotlib.pyplot as plt
+
+        # Skip asset classes never held
+        modes = [mode for mode in categories if mode in values and values[mode].any()]
+
+        if not modes:
+            return
+
+        # Create image buffer
+        png_file = io.BytesIO()
+
+        # Create stacked area chart (per asset class) ..
+        figure, axes = plt.subplots(figsize=(10, 6))
+        axes.stackplot(dates, [values[mode] for mode in modes], labels=[categories[mode] for mode in modes], alpha=0.8)
+
+        # .. & add total
+        total = sum(values[mode] for mode in modes)
+        axes.plot(dates, total, color='black', linewidth=1, label='Gesamt')
+
+        axes.set_ylabel('EUR')
+        axes.legend(loc='upper left')
+        axes.grid(alpha=0.3)
+
+        figure.autofmt_xdate()
+        figure.savefig(png_file, format='png', bbox_inches='tight')
+        plt.close(figure)
+
+        # Add a page
+        self.pdf.add_page()
+
+        # Insert heading
+        self.pdf.ln(5)
+        self.pdf.set_font('times', 'B', 10)
+        self.pdf.cell(40, 8, 'Entwicklung deines Vermögens (Tageswerte):', ln=True)
+        self.pdf.ln(5)
+
+        # Insert image
+        self.pdf.image(png_file, 15, self.pdf.get_y(), pdf_width - 30)
+        self.pdf.ln(115)
+
+        # Insert table (values at end of each year)
+        col_width = (pdf_width - 30) / (len(modes) + 2)
+        th = self.pdf.font_size + 2
+
+        self.pdf.cell(col_width, th, 'Datum', align='C', border=1)
+
+        for mode in modes:
+            self.pdf.cell(col_width, th, categories[mode], align='C', border=1)
+
+        self.pdf.cell(col_width, th, 'Gesamt', align='C', border=1)
+        self.pdf.ln(th)
+        self.pdf.set_font('times', '', 9)
+
+        # Determine last day of each year (& last day overall)
+        years = dates.astype('datetime64[Y]')
+        rows = [index for index in range(len(dates) - 1) if years[index] != years[index + 1]] + [len(dates) - 1]
+
+        for index in rows:
+            self.pdf.cell(col_width, th, dates[index].item().strftime(self.pdf.date_format), align='C', border=1)
+
+            for mode in modes:
+                self.pdf.cell(col_width, th, '{:.2f}'.format(values[mode][index]), align='R', border=1)
+
+            self.pdf.cell(col_width, th, '{:.2f}'.format(total[index]), align='R', border=1)
+            self.pdf.ln(th)
+
+
     def add_donations_page(self, donations: list) -> None:
         # Import dependency
         import pyqrcode
@@ -651,15 +722,18 @@ class Document:
             # .. limit them
             donations = donations[:3]
 
+        # Create data array for QR codes
+        png_files = []
+
         # Loop over donations
         for donation in donations:
-            # Generate QR code
-            png_file = os.path.join(self.app_dir, '{}.png'.format(slugify(donation['title'])))
+            # Generate QR code (in memory)
+            png_file = io.BytesIO()
             code = pyqrcode.create(donation['address'])
             code.png(png_file, scale=1, module_color=[0, 0, 0, 128], background=[0xff, 0xff, 0xff])
 
-            # Add to donation
-            donation['qr'] = png_file
+            # Store image
+            png_files.append(png_file)
 
         # Add a page
         self.pdf.add_page()
@@ -684,7 +758,7 @@ class Document:
 
             # Insert QR code & transfer details
             self.pdf.cell(40, 8, '{}:\n'.format(donation['title']), ln=True)
-            self.pdf.image(donation['qr'], x, y, width)
+            self.pdf.image(png_files[index], x, y, width)
             self.pdf.ln(20)
             self.pdf.cell(0, 0, '{}\n'.format(donation['address']), ln=True, align = 'C')
             self.pdf.ln(20)
@@ -708,7 +782,73 @@ class Document:
         # Export PDF report
         self.pdf.output(output_file)
 
-        # Loop over generated images ..
-        for png_file in glob.glob(os.path.join(self.app_dir, '*.png')):
-            # .. deleting each one of them
-            os.remove(png_file)
+
+def render_fragment(section: tuple) -> bytes:
+    '''Renders single section as PDF fragment (without page numbers)'''
+
+    # Determine `Document` method & its arguments
+    method, args = section
+
+    # Set up PDF generation
+    document = Document()
+
+    # Disable footer (page numbers are added when merging fragments)
+    document.pdf.show_footer = False
+
+    # Render section
+    getattr(document, method)(*args)
+
+    # If section is empty ..
+    if document.pdf.page == 0:
+        # .. skip it (as blank page would be added otherwise)
+        return b''
+
+    return bytes(document.pdf.output())
+
+
+def merge_fragments(fragments: list, output_file: str, title: str = 'Bitpanda Report') -> None:
+    '''Merges PDF fragments into one document, numbering pages across all of them'''
+
+    # Import dependency
+    from pypdf import PdfReader, PdfWriter
+
+    # Load fragments (skipping empty ones)
+    readers = [PdfReader(io.BytesIO(fragment)) for fragment in fragments if fragment]
+
+    # Create footers for all pages at once, so that 'nb' resolves to total page count
+    # (1) Set up footer-only document
+    stamps = PDF('P', 'mm', 'A4')
+    stamps.show_header = False
+    stamps.alias_nb_pages(alias='nb')
+    stamps.set_auto_page_break(auto=False)
+
+    # (2) Add one page per merged page
+    for _ in range(sum(len(reader.pages) for reader in readers)):
+        stamps.add_page()
+
+    # (3) Load them
+    stamps = PdfReader(io.BytesIO(bytes(stamps.output())))
+
+    # Merge fragments, stamping each page with its footer
+    writer = PdfWriter()
+
+    index = 0
+
+    for reader in readers:
+        for page in reader.pages:
+            page.merge_page(stamps.pages[index])
+
+            # Compress merged content (as merging leaves it uncompressed)
+            writer.add_page(page).compress_content_streams()
+
+            index += 1
+
+    # Share identical objects (eg fonts embedded by every fragment)
+    writer.compress_identical_objects()
+
+    # Set document title
+    writer.add_metadata({'/Title': title})
+
+    # Export PDF report
+    with open(output_file, 'wb') as file:
+        writer.write(file)
@@ -0,0 +1,278 @@
+import csv
+import os
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import click
+
+from ..utils import create_path
+
+
+# Define globally ..
+# (1) .. store format (magic bytes & version, bumped whenever layout changes)
+store_magic = b'BPPS'
+store_version = 1
+
+# (2) .. layout of header (magic, version, number of assets) & directory entries (name length, number of prices, offset)
+header_format = struct.Struct('<4sHI')
+entry_format = struct.Struct('<HIQ')
+
+# (3) .. start of timestamps (naive, same as transaction dates)
+epoch = datetime(1970, 1, 1)
+
+
+def to_timestamp(moment: datetime) -> int:
+    return (moment - epoch) // timedelta(seconds=1)
+
+
+def parse_moment(value: str) -> datetime:
+    '''Parses date (midnight) or timestamp (ignoring timezone, same as transaction dates)'''
+
+    return datetime.fromisoformat(value[:19].replace('T', ' ')) if len(value) > 10 else datetime.fromisoformat(value[:10])
+
+
+def read_price_rows(price_file: str) -> list:
+    '''Loads price history (CSV file with 'Date', 'Asset' & 'Price' columns, prices in €uro)'''
+
+    try:
+        with open(price_file, newline='') as file:
+            return [(parse_moment(row['Date']), row['Asset'], float(row['Price'])) for row in csv.DictReader(file)]
+
+    except (KeyError, TypeError, ValueError):
+        raise Exception('Invalid price history "{}" (expected "Date", "Asset" & "Price" columns)'.format(price_file))
+
+
+class PriceStore:
+    '''Price history (per asset), sorted by timestamp & memory-mapped from compact binary file'''
+
+    def __init__(self, series: dict = None) -> None:
+        # Create data array, holding (per asset) timestamps (in seconds, ascending) & prices (in €uro)
+        self.series = series or {}
+
+        # Keep track of mapped file (if any)
+        self.buffer = None
+
+
+    def __len__(self) -> int:
+        return sum(len(timestamps) for timestamps, _ in self.series.values())
+
+
+    def get_assets(self) -> list:
+        return sorted(self.series.keys())
+
+
+    def get_price(self, asset: str, moment: datetime) -> float:
+        '''Determines last known price (at or before given time, `None` if unknown)'''
+
+        if asset not in self.series:
+            return None
+
+        timestamps, prices = self.series[asset]
+
+        # Find last price until given time (using binary search)
+        index = bisect_right(timestamps, to_timestamp(moment))
+
+        return prices[index - 1] if index > 0 else None
+
+
+    def get_prices(self, asset: str, moments: list) -> list:
+        '''Determines last known prices (for many points in time, looking up series once)'''
+
+        if asset not in self.series:
+            return [None] * len(moments)
+
+        timestamps, prices = self.series[asset]
+
+        # Create data array
+        result = []
+
+        for moment in moments:
+            index = bisect_right(timestamps, to_timestamp(moment))
+            result.append(prices[index - 1] if index > 0 else None)
+
+        return result
+
+
+    def add(self, rows: list) -> None:
+        '''Adds prices (later ones replacing earlier ones of same asset & time)'''
+
+        # Group prices (per asset, keyed by timestamp)
+        groups = {asset: dict(zip(timestamps, prices)) for asset, (timestamps, prices) in self.series.items()}
+
+        for moment, asset, price in rows:
+            groups.setdefault(asset, {})[to_timestamp(moment)] = price
+
+        # Sort them (by timestamp)
+        self.series = {}
+
+        for asset, entries in groups.items():
+            timestamps = sorted(entries)
+            self.series[asset] = (array('q', timestamps), array('d', (entries[timestamp] for timestamp in timestamps)))
+
+        # Release mapped file (as series were copied)
+        self.release()
+
+
+    def release(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+
+
+    def close(self) -> None:
+        # Drop series (pointing into mapped file) before releasing it
+        self.series = {}
+        self.release()
+
+
+def get_store_file() -> str:
+    '''Determines default price store (inside app directory)'''
+
+    return os.path.join(click.get_app_dir('bitpanda'), 'prices.bin')
+
+
+def load_store(store_file: str) -> PriceStore:
+    '''Maps price store (reading only directory, series are accessed in place)'''
+
+    store = PriceStore()
+
+    with open(store_file, 'rb') as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Empty files can't be mapped
+        except ValueError:
+            raise Exception('Invalid price store "{}"'.format(store_file))
+
+    view = memoryview(buffer)
+
+    try:
+        magic, version, count = header_format.unpack_from(buffer, 0)
+
+        if magic != store_magic or version != store_version:
+            raise struct.error
+
+        position = header_format.size
+
+        for _ in range(count):
+            length, size, offset = entry_format.unpack_from(buffer, position)
+            position += entry_format.size
+
+            asset = bytes(buffer[position:position + length]).decode('utf-8')
+            position += length
+
+            if offset + size * 16 > len(buffer):
+                raise struct.error
+
+            timestamps = view[offset:offset + size * 8]
+            prices = view[offset + size * 8:offset + size * 16]
+
+            # Use series in place (or copy them, if byte order differs)
+            if sys.byteorder == 'little':
+                store.series[asset] = (timestamps.cast('q'), prices.cast('d'))
+
+            else:
+                timestamps, prices = array('q', timestamps.tobytes()), array('d', prices.tobytes())
+                timestamps.byteswap()
+                prices.byteswap()
+
+                store.series[asset] = (timestamps, prices)
+
+    except (struct.error, UnicodeDecodeError, ValueError, TypeError):
+        raise Exception('Invalid price store "{}"'.format(store_file))
+
+    store.buffer = buffer
+
+    return store
+
+
+def save_store(store: PriceStore, store_file: str) -> None:
+    '''Writes price store (header, directory & series, each aligned to eight bytes)'''
+
+    if not create_path(os.path.dirname(os.path.abspath(store_file))):
+        raise Exception('Unable to create directory "{}"'.format(os.path.dirname(store_file)))
+
+    assets = store.get_assets()
+    names = [asset.encode('utf-8') for asset in assets]
+
+    # Determine start of series (after directory)
+    offset = header_format.size + sum(entry_format.size + len(name) for name in names)
+    offset += -offset % 8
+
+    # Build directory
+    directory = [header_format.pack(store_magic, store_version, len(assets))]
+
+    for asset, name in zip(assets, names):
+        size = len(store.series[asset][0])
+        directory.append(entry_format.pack(len(name), size, offset) + name)
+        offset += size * 16
+
+    header = b''.join(directory)
+
+    # Write to temporary file first (so interrupted imports keep previous store)
+    temp_file = '{}.tmp'.format(store_file)
+
+    with open(temp_file, 'wb') as file:
+        file.write(header + b'\0' * (-len(header) % 8))
+
+        for asset in assets:
+            timestamps, prices = (array(code, values) for code, values in zip('qd', store.series[asset]))
+
+            # Store little-endian (regardless of platform)
+            if sys.byteorder != 'little':
+                timestamps.byteswap()
+                prices.byteswap()
+
+            timestamps.tofile(file)
+            prices.tofile(file)
+
+    os.replace(temp_file, store_file)
+
+
+def import_prices(price_files: list, store_file: str) -> PriceStore:
+    '''Imports price history (CSV files) into price store, merging them with existing prices'''
+
+    # Load existing prices (if any) ..
+    store = load_store(store_file) if os.path.exists(store_file) else PriceStore()
+
+    # .. & add new ones (copying series out of mapped file)
+    rows = []
+
+    for price_file in price_files:
+        rows.extend(read_price_rows(price_file))
+
+    store.add(rows)
+    save_store(store, store_file)
+
+    return store
+
+
+def assign_cost_basis(items: list, store: PriceStore) -> int:
+    '''Values transfers lacking cost basis at last known price (looking up each asset once), returning number of valued transfers'''
+
+    # Group transfers (by asset)
+    groups = {}
+
+    for item in items:
+        groups.setdefault(item.asset, []).append(item)
+
+    # Create counter
+    count = 0
+
+    for asset, asset_items in groups.items():
+        for item, price in zip(asset_items, store.get_prices(asset, [item.date for item in asset_items])):
+            # Skip transfers preceding price history
+            if price is None:
+                continue
+
+            # Use price for both total (of whole lot) & unit price (of partial lots)
+            item.price = price
+            item.amount = round(item.quantity * price, 2)
+
+            count += 1
+
+    return count
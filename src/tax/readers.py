@@ -0,0 +1,780 @@
+import io
+import os
+import re
+import bz2
+import csv
+import glob
+import gzip
+import lzma
+import math
+import mmap
+import heapq
+import locale
+import zipfile
+from array import array
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+
+# Define globally ..
+# (1) .. values considered missing (same as `pandas.read_csv` defaults)
+na_values = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+}
+
+# (2) .. boolean values (same as `pandas.read_csv` defaults)
+bool_values = {
+    'True': True,
+    'TRUE': True,
+    'true': True,
+    'False': False,
+    'FALSE': False,
+    'false': False,
+}
+
+# (3) .. sort order 'by timestamp'
+by_timestamp = itemgetter('Timestamp')
+
+# (4) .. number patterns
+int_pattern = re.compile(r'^[+-]?\d+$')
+float_pattern = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$|^[+-]?(inf|Inf|INF|infinity|Infinity)$')
+
+# (5) .. compressed file formats (by extension)
+compressions = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+# (6) .. missing values, booleans & number patterns (as parsed from memory-mapped files)
+na_bytes = {value.encode() for value in na_values}
+bool_bytes = {value.encode(): result for value, result in bool_values.items()}
+int_bytes_pattern = re.compile(int_pattern.pattern.encode())
+float_bytes_pattern = re.compile(float_pattern.pattern.encode())
+
+# (7) .. size of chunks parsed from memory-mapped files (before releasing their pages)
+chunk_size = 1 << 20
+
+# (8) .. distinct values per string column kept as (decoded) strings, beyond which they're kept as bytes
+max_categories = 1024
+
+# (9) .. largest codes of string columns (per array type, see `TextColumn`)
+code_limits = {'b': 127, 'h': 32767}
+
+
+def split_archive(input_file: str) -> tuple:
+    '''Splits path of archive member (eg 'exports.zip/2021.csv') into archive & member'''
+
+    archive, separator, member = input_file.partition('.zip/')
+
+    # If path points into existing ZIP archive ..
+    if separator and os.path.isfile(archive + '.zip'):
+        # .. split it
+        return (archive + '.zip', member)
+
+    return (input_file, None)
+
+
+class ArchiveMember(io.BufferedIOBase):
+    '''Binary stream of (possibly compressed) ZIP archive member, closing archive along with it'''
+
+    def __init__(self, archive: str, member: str, decompress=None) -> None:
+        self.archive = zipfile.ZipFile(archive)
+
+        # Stack streams (as decompressing ones don't close their source)
+        self.streams = []
+
+        try:
+            self.streams.append(self.archive.open(member))
+
+            if decompress:
+                self.streams.append(decompress(self.streams[-1], 'rb'))
+
+        except BaseException:
+            self.close()
+
+            raise
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return self.streams[-1].seekable()
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.streams[-1].seek(offset, whence)
+
+
+    def tell(self) -> int:
+        return self.streams[-1].tell()
+
+
+    def read(self, size: int = -1) -> bytes:
+        return self.streams[-1].read(size)
+
+
+    def read1(self, size: int = -1) -> bytes:
+        return self.streams[-1].read1(size)
+
+
+    def close(self) -> None:
+        # Close streams (innermost first) & archive
+        try:
+            while self.streams:
+                self.streams.pop().close()
+
+        finally:
+            self.archive.close()
+            super().close()
+
+
+def open_input(input_file: str):
+    '''Opens (possibly compressed or archived) CSV file as text stream, decompressing on-the-fly'''
+
+    # Determine compression (if any)
+    extension = os.path.splitext(input_file)[1].lower()
+
+    # If file is member of ZIP archive ..
+    archive, member = split_archive(input_file)
+
+    if member:
+        # .. read it from there (decompressing while reading, if necessary)
+        return io.TextIOWrapper(ArchiveMember(archive, member, compressions.get(extension)), newline='')
+
+    # If compressed ..
+    if extension in compressions:
+        # .. decompress while reading
+        return compressions[extension](input_file, 'rt', newline='')
+
+    return open(input_file, 'r', newline='')
+
+
+def skip_preamble(file) -> int:
+    '''Advances stream to header line, returning number of lines preceding it'''
+
+    index = 0
+
+    # Loop over lines ..
+    while True:
+        position = file.tell()
+        line = file.readline()
+
+        # .. until end of file
+        if not line:
+            break
+
+        # .. if header line is found ..
+        if 'Transaction ID' in line:
+            # .. move back to its beginning
+            file.seek(position)
+
+            return index
+
+        index += 1
+
+    # Fallback to default
+    file.seek(0)
+
+    for _ in range(6):
+        file.readline()
+
+    return 6
+
+
+def to_column(values: list, encoding: str = None):
+    '''Converts raw strings (or bytes, if encoding is given) into typed column, inferring types like `pandas` does'''
+
+    # Determine missing values, booleans & number patterns
+    if encoding:
+        na, bools, ints, floats = na_bytes, bool_bytes, int_bytes_pattern, float_bytes_pattern
+
+    else:
+        na, bools, ints, floats = na_values, bool_values, int_pattern, float_pattern
+
+    # Count missing values
+    missing = sum(1 for value in values if value in na)
+
+    # If all values are missing ..
+    if missing == len(values):
+        # .. use float column of NaNs
+        return array('d', [math.nan] * len(values))
+
+    # If all values are booleans ..
+    if not missing and all(value in bools for value in values):
+        return [bools[value] for value in values]
+
+    present = [value for value in values if value not in na]
+
+    # If all values are integers ..
+    if all(ints.match(value) for value in present):
+        # .. use integer column (unless values are missing)
+        if not missing:
+            return array('q', [int(value) for value in values])
+
+        return array('d', [math.nan if value in na else float(value) for value in values])
+
+    # If all values are numbers ..
+    if all(floats.match(value) for value in present):
+        # .. use float column
+        return array('d', [math.nan if value in na else float(value) for value in values])
+
+    # .. otherwise use string column
+    if encoding:
+        # Decode repeated values (eg asset names) only once
+        strings = {}
+
+        return [math.nan if value in na else strings.get(value) or strings.setdefault(value, value.decode(encoding)) for value in values]
+
+    return [math.nan if value in na else value for value in values]
+
+
+class Row(Mapping):
+    '''Single record, reading its values from (shared) typed columns'''
+
+    __slots__ = ('columns', 'index')
+
+
+    def __init__(self, columns: dict, index: int) -> None:
+        self.columns = columns
+        self.index = index
+
+
+    def __getitem__(self, key):
+        return self.columns[key][self.index]
+
+
+    def __iter__(self):
+        return iter(self.columns)
+
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Table(Sequence):
+    '''Records of typed columns (creating rows only when accessed)'''
+
+    __slots__ = ('columns', 'length')
+
+
+    def __init__(self, columns: dict, length: int) -> None:
+        self.columns = columns
+        self.length = length
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Row(self.columns, position) for position in range(*index.indices(self.length))]
+
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError('Row index out of range')
+
+        return Row(self.columns, index)
+
+
+    def __iter__(self):
+        columns = self.columns
+
+        return (Row(columns, index) for index in range(self.length))
+
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class TextColumn:
+    '''String column, keeping repeated values once (as codes) & mostly unique ones as bytes (decoded on access)'''
+
+    __slots__ = ('encoding', 'codes', 'lookup', 'values', 'blob', 'ends')
+
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+
+        # Start out with codes (-1 for missing values, widening type as needed) ..
+        self.codes = array('b')
+        self.lookup = {}
+        self.values = []
+
+        # .. switching to concatenated bytes & their end offsets (inverted for missing values)
+        self.blob = None
+        self.ends = None
+
+
+    def __len__(self) -> int:
+        return len(self.codes) if self.blob is None else len(self.ends)
+
+
+    def __getitem__(self, index: int):
+        if self.blob is None:
+            code = self.codes[index]
+
+            return self.values[code] if code >= 0 else math.nan
+
+        end = self.ends[index]
+
+        if end < 0:
+            return math.nan
+
+        start = self.ends[index - 1] if index > 0 else 0
+
+        return self.blob[start if start >= 0 else ~start:end].decode(self.encoding)
+
+
+    def append(self, value: bytes) -> None:
+        # Append bytes ..
+        if self.blob is not None:
+            if value is None:
+                self.ends.append(~len(self.blob))
+
+            else:
+                self.blob += value
+                self.ends.append(len(self.blob))
+
+            return
+
+        # .. or codes (decoding each distinct value once)
+        if value is None:
+            self.codes.append(-1)
+
+            return
+
+        code = self.lookup.get(value)
+
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value.decode(self.encoding))
+
+            # Widen type of codes (if necessary)
+            if code > code_limits.get(self.codes.typecode, code):
+                self.codes = array('h' if code <= code_limits['h'] else 'l', self.codes)
+
+        self.codes.append(code)
+
+        # Switch to bytes if values hardly repeat (eg IDs & timestamps)
+        if len(self.values) > max_categories and len(self.values) * 4 > len(self.codes):
+            self.to_bytes()
+
+
+    def to_bytes(self) -> None:
+        values = [value.encode(self.encoding) for value in self.values]
+        codes = self.codes
+
+        self.codes, self.lookup, self.values = array('b'), {}, []
+        self.blob, self.ends = bytearray(), array('q')
+
+        for code in codes:
+            self.append(values[code] if code >= 0 else None)
+
+
+    def is_missing(self) -> bool:
+        '''Checks whether any value is missing'''
+
+        if self.blob is None:
+            return -1 in self.codes
+
+        return any(end < 0 for end in self.ends)
+
+
+class ColumnBuilder:
+    '''Collects raw values of single column, inferring its type on-the-fly (same as `to_column`)'''
+
+    __slots__ = ('encoding', 'kind', 'values', 'count')
+
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+
+        # Determine type (`None` while values are missing), being ..
+        # (1) .. 'int' (as long as no value is missing)
+        # (2) .. 'float' (missing values being NaN)
+        # (3) .. 'text' (see `TextColumn`)
+        self.kind = None
+        self.values = None
+
+        # Count values (while their type is unknown)
+        self.count = 0
+
+
+    def append(self, value: bytes, previous) -> None:
+        '''Adds raw value (fetching previous ones through given function, in case of switching to text)'''
+
+        kind = self.kind
+        missing = value in na_bytes
+
+        if kind == 'text':
+            self.values.append(None if missing else value)
+
+        elif kind == 'float':
+            if missing:
+                self.values.append(math.nan)
+
+            elif float_bytes_pattern.match(value):
+                self.values.append(float(value))
+
+            else:
+                self.to_text(previous, value)
+
+        elif kind == 'int':
+            if not missing and int_bytes_pattern.match(value):
+                self.values.append(int(value))
+
+            else:
+                # Convert to float column (keeping integers as floats, like `pandas` does)
+                self.kind, self.values = 'float', array('d', self.values)
+                self.append(value, previous)
+
+        # If all values are missing so far ..
+        elif missing:
+            self.count += 1
+
+        # .. determine type by first value
+        elif int_bytes_pattern.match(value) and not self.count:
+            self.kind, self.values = 'int', array('q', [int(value)])
+
+        elif float_bytes_pattern.match(value):
+            self.kind, self.values = 'float', array('d', [math.nan] * self.count)
+            self.values.append(float(value))
+
+        else:
+            self.kind, self.values = 'text', TextColumn(self.encoding)
+
+            for _ in range(self.count):
+                self.values.append(None)
+
+            self.values.append(value)
+
+
+    def to_text(self, previous, value: bytes) -> None:
+        # Collect previous values again (as numbers don't preserve their formatting)
+        self.kind, self.values = 'text', TextColumn(self.encoding)
+
+        for item in previous():
+            self.values.append(None if item in na_bytes else item)
+
+        self.values.append(value)
+
+
+    def build(self, length: int):
+        # If all values are missing ..
+        if self.kind is None:
+            # .. use float column of NaNs
+            return array('d', [math.nan] * length)
+
+        # If all values are booleans ..
+        if self.kind == 'text' and self.values.blob is None and set(self.values.values) <= bool_values.keys() and not self.values.is_missing():
+            return [bool_values[value] for value in (self.values[index] for index in range(length))]
+
+        return self.values
+
+
+def read_with_pandas(input_file: str) -> list:
+    # Import dependency
+    import pandas as pd
+
+    with open_input(input_file) as file:
+        # Skip lines preceding header
+        skip_preamble(file)
+
+        return pd.read_csv(file).to_dict('records')
+
+
+def read_with_csv(input_file: str) -> list:
+    with open_input(input_file) as file:
+        # Skip lines preceding header
+        skiprows = skip_preamble(file)
+
+        reader = csv.reader(file)
+
+        # Determine columns
+        header = next(reader)
+
+        # Collect raw values per column
+        raw = [[] for _ in header]
+
+        for line, row in enumerate(reader, skiprows + 2):
+            # Skip blank lines
+            if not row:
+                continue
+
+            if len(row) > len(header):
+                raise Exception('Expected {} fields in line {}, saw {}'.format(len(header), line, len(row)))
+
+            # Pad incomplete rows
+            row += [''] * (len(header) - len(row))
+
+            for index, value in enumerate(row):
+                raw[index].append(value)
+
+    # Convert to typed columns
+    columns = [to_column(values) for values in raw]
+
+    # Build records
+    return [dict(zip(header, values)) for values in zip(*columns)]
+
+
+def split_fields(line: bytes, encoding: str) -> list:
+    '''Splits CSV line into raw fields (unquoting them, if necessary)'''
+
+    # If there are no quoted fields ..
+    if b'"' not in line:
+        # .. split right away
+        return line.split(b',')
+
+    return [field.encode(encoding) for field in next(csv.reader([line.decode(encoding)]))]
+
+
+def read_line(buffer, start: int) -> tuple:
+    '''Reads line starting at given offset (keeping quoted line breaks), returning it & start of next one'''
+
+    end = buffer.find(b'\n', start)
+
+    if end == -1:
+        end = len(buffer)
+
+    line = buffer[start:end]
+
+    while line.count(b'"') % 2 and end < len(buffer):
+        end = buffer.find(b'\n', end + 1)
+
+        if end == -1:
+            end = len(buffer)
+
+        line = buffer[start:end]
+
+    return (line.rstrip(b'\r\n'), end + 1)
+
+
+def read_with_mmap(input_file: str) -> list:
+    # If file needs to be decompressed ..
+    if split_archive(input_file)[1] or os.path.splitext(input_file)[1].lower() in compressions:
+        # .. it can't be mapped
+        return read_with_csv(input_file)
+
+    # Use same encoding as `open`
+    encoding = locale.getpreferredencoding(False)
+
+    with open(input_file, 'rb') as file:
+        # Empty files can't be mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+
+        # Map file into memory (sharing page cache with other processes)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            size = len(buffer)
+
+            # Locate header line (defaulting to seventh line)
+            start = buffer.find(b'Transaction ID')
+
+            if start > -1:
+                start = buffer.rfind(b'\n', 0, start) + 1
+
+            else:
+                start = 0
+
+                for _ in range(6):
+                    start = buffer.find(b'\n', start) + 1 or size
+
+            skiprows = buffer[:start].count(b'\n')
+
+            # Determine columns
+            line, position = read_line(buffer, start)
+            header = [field.decode(encoding) for field in split_fields(line, encoding)] if line else []
+
+            # Keep track of where rows start (for reading their values again, see `ColumnBuilder.to_text`)
+            starts = array('Q')
+
+            def get_fields(line: bytes) -> list:
+                fields = split_fields(line, encoding)
+
+                if len(fields) > len(header):
+                    raise Exception('Expected {} fields in line {}, saw {}'.format(len(header), skiprows + 2 + len(starts), len(fields)))
+
+                # Pad incomplete rows
+                return fields + [b''] * (len(header) - len(fields))
+
+            def get_previous(index: int):
+                return lambda: (get_fields(read_line(buffer, offset)[0])[index] for offset in starts)
+
+            # Create typed columns (along with functions fetching previous values)
+            builders = [ColumnBuilder(encoding) for _ in header]
+            fetchers = [get_previous(index) for index in range(len(header))]
+
+            # Keep track of pages to be released
+            released = 0
+
+            # Parse rows chunk by chunk ..
+            while position < size:
+                end = min(position + chunk_size, size)
+
+                while position < end:
+                    line_start = position
+                    line, position = read_line(buffer, position)
+
+                    # Skip blank lines
+                    if not line:
+                        continue
+
+                    for builder, value, previous in zip(builders, get_fields(line), fetchers):
+                        builder.append(value, previous)
+
+                    starts.append(line_start)
+
+                # .. releasing their pages right away (keeping resident memory low)
+                if hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_DONTNEED'):
+                    until = min(position, size) // mmap.PAGESIZE * mmap.PAGESIZE
+
+                    if until > released:
+                        buffer.madvise(mmap.MADV_DONTNEED, released, until - released)
+                        released = until
+
+    # Build records (as views on typed columns)
+    columns = {name: builder.build(len(starts)) for name, builder in zip(header, builders)}
+
+    return Table(columns, len(starts))
+
+
+# Define ingestion engines
+engines = {
+    'pandas': read_with_pandas,
+    'csv': read_with_csv,
+    'mmap': read_with_mmap,
+}
+
+
+def get_engine(name: str = None) -> str:
+    '''Determines ingestion engine, preferring `pandas` (if installed)'''
+
+    # If specified ..
+    if name and name != 'auto':
+        if name not in engines:
+            raise Exception('Unknown engine "{}"'.format(name))
+
+        # .. use it
+        return name
+
+    try:
+        import pandas
+
+        return 'pandas'
+
+    except ImportError:
+        return 'csv'
+
+
+def read_csv(input_file: str, engine: str = None) -> list:
+    '''Loads CSV export as list of records'''
+
+    return engines[get_engine(engine)](input_file)
+
+
+def is_csv(input_file: str) -> bool:
+    '''Checks whether file is (possibly compressed) CSV file'''
+
+    name, extension = os.path.splitext(input_file.lower())
+
+    if extension in compressions:
+        name, extension = os.path.splitext(name)
+
+    return extension == '.csv'
+
+
+def expand_paths(input_files: list) -> list:
+    '''Expands glob patterns (eg 'exports/*.csv') & ZIP archives into list of files'''
+
+    # Create data array
+    paths = []
+
+    for pattern in input_files:
+        # If pattern contains wildcards ..
+        if any(char in pattern for char in '*?['):
+            # .. add matching files
+            matches = sorted(glob.glob(pattern))
+
+        # .. otherwise add file as-is
+        else:
+            matches = [pattern]
+
+        for path in matches:
+            # If file is ZIP archive ..
+            if path.lower().endswith('.zip') and os.path.isfile(path):
+                # .. add its (possibly compressed) CSV files instead
+                with zipfile.ZipFile(path) as archive:
+                    paths += ['{}/{}'.format(path, member) for member in sorted(archive.namelist()) if is_csv(member)]
+
+            else:
+                paths.append(path)
+
+    return paths
+
+
+def merge_rows(tables: list) -> list:
+    '''Merges tables into one time-ordered table, skipping duplicate transactions'''
+
+    for index, rows in enumerate(tables):
+        # Determine timestamps
+        timestamps = [row['Timestamp'] for row in rows]
+
+        # If table is in descending order ..
+        if timestamps == sorted(timestamps, reverse=True):
+            # .. reverse it
+            tables[index] = rows[::-1]
+
+        # .. otherwise, if table is unordered ..
+        elif timestamps != sorted(timestamps):
+            # .. sort it
+            tables[index] = sorted(rows, key=by_timestamp)
+
+    # Create data array
+    result = []
+
+    # Keep track of processed transactions
+    seen = set()
+
+    # Merge already sorted tables (without sorting all of them again)
+    for row in heapq.merge(*tables, key=by_timestamp):
+        # Skip duplicates (as exports may overlap)
+        if row['Transaction ID'] in seen:
+            continue
+
+        seen.add(row['Transaction ID'])
+        result.append(row)
+
+    return result
+
+
+def read_files(input_files: list, engine: str = None) -> list:
+    '''Loads (possibly overlapping, compressed or archived) CSV exports as one list of records'''
+
+    # Expand glob patterns
+    paths = expand_paths(input_files)
+
+    if not paths:
+        raise Exception('No input files found')
+
+    # If there's only one file ..
+    if len(paths) == 1:
+        # .. load it as-is
+        return read_csv(paths[0], engine)
+
+    # Determine engine (once for all processes)
+    engine = get_engine(engine)
+
+    # Parse files in parallel
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+        tables = list(executor.map(read_csv, paths, [engine] * len(paths)))
+
+    return merge_rows(tables)
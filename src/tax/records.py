@@ -0,0 +1,196 @@
+import math
+
+from .fixed import amount_decimals, from_fixed, quantity_decimals
+
+
+# Define labels (as displayed in reports) ..
+# (1) .. per field
+field_labels = {
+    'date': 'Datum',
+    'kind': 'Transaktion',
+    'amount': 'Betrag',
+    'quantity': 'Asset Menge',
+    'price': 'Asset Preis',
+    'asset': 'Asset',
+    'fee': 'Gebühren',
+}
+
+# (2) .. per transaction kind
+kind_labels = {
+    # (a) Transaction types
+    'buy': 'Kauf',
+    'sell': 'Verkauf',
+    'deposit': 'Einzahlung',
+    'withdrawal': 'Auszahlung',
+
+    # (b) Transfer types
+    'incoming': 'Empfangen',
+    'outgoing': 'Versendet',
+    'received': 'erhalten',
+    'rewards': 'Rewards',
+
+    # (c) Fallback
+    'unknown': 'unbekannt',
+}
+
+# Define columns of normalized records (as exported by 'Bitpanda', see `make_record`)
+record_columns = [
+    'Transaction ID', 'Timestamp', 'Transaction Type', 'In/Out', 'Amount Fiat', 'Fiat',
+    'Amount Asset', 'Asset', 'Asset market price', 'Asset market price currency',
+    'Asset class', 'Product ID', 'Fee', 'Fee asset', 'Spread', 'Spread Currency',
+]
+
+# Define number formats
+# (quantities & fees use up to eight decimals, see `format_value`)
+formats = {
+    'amount': '{:.2f}',
+    'price': '{:.2f}',
+}
+
+# Define transfers received without known cost basis
+transfer_kinds = {'received', 'rewards'}
+
+
+def has_cost_basis(item) -> bool:
+    '''Determines whether cost basis of incoming transaction is known (transfers only once valued, see 'tax/prices.py')'''
+
+    return item.kind not in transfer_kinds or bool(item.amount)
+
+
+def make_record(transaction_id: str, timestamp: str, transaction_type: str, direction: str, asset: str, asset_class: str, amount_fiat: str, fiat: str = 'EUR', amount_asset: str = '-', price: str = '-', product_id: str = '-', fee: str = '-', fee_asset: str = '-') -> dict:
+    '''Creates normalized record (same as rows of CSV export, missing values being '-')'''
+
+    return dict(zip(record_columns, [
+        transaction_id, timestamp, transaction_type, direction, amount_fiat, fiat,
+        amount_asset, asset, price, fiat if price != '-' else '-',
+        asset_class, product_id, fee, fee_asset if fee != '-' else '-', '-', '-',
+    ]))
+
+
+def to_number(value) -> float:
+    '''Converts CSV value to float, treating missing values ('-' or NaN) as zero'''
+
+    if value == '-' or value is None:
+        return 0.0
+
+    value = float(value)
+
+    if math.isnan(value):
+        return 0.0
+
+    return value
+
+
+def format_value(field: str, value) -> str:
+    '''Formats value for display (applying German labels to transaction kinds)'''
+
+    if value is None:
+        return '-'
+
+    if field == 'kind':
+        return kind_labels.get(value, value)
+
+    if field in formats:
+        return formats[field].format(value)
+
+    if field in ['quantity', 'fee']:
+        # Strip trailing zeros (keeping at least two decimals)
+        value = '{:.8f}'.format(value).rstrip('0')
+
+        return value + '0' * (2 - len(value.split('.')[1]))
+
+    return str(value)
+
+
+class Transaction:
+    '''Single transaction, shared (by reference) across all processing stages'''
+
+    __slots__ = ('date', 'kind', 'asset', 'amount', 'quantity', 'price', 'fee', 'transaction_id')
+
+
+    def __init__(self, date, kind: str, asset: str, amount: float, quantity: float = None, price: float = None, fee: float = None, transaction_id: str = None) -> None:
+        self.date = date
+        self.kind = kind
+        self.asset = asset
+        self.amount = amount
+        self.quantity = quantity
+        self.price = price
+        self.fee = fee
+        self.transaction_id = transaction_id
+
+
+    def __repr__(self) -> str:
+        return 'Transaction({})'.format(', '.join('{}={!r}'.format(field, getattr(self, field)) for field in self.__slots__))
+
+
+    def to_dict(self) -> dict:
+        '''Converts transaction to dictionary with German labels (skipping unavailable fields)'''
+
+        # Create data array
+        data = {}
+
+        for field in field_labels.keys():
+            value = getattr(self, field)
+
+            # Skip unavailable fields (eg asset quantity of `fiat` transactions)
+            if value is None:
+                continue
+
+            if field == 'date':
+                value = str(value)
+
+            if field == 'kind':
+                value = kind_labels.get(value, value)
+
+            data[field_labels[field]] = value
+
+        return data
+
+
+class Lot:
+    '''Remainder of incoming transaction, not (yet) matched by outgoing ones'''
+
+    __slots__ = ('transaction', 'units', 'cents')
+
+
+    def __init__(self, transaction: Transaction, units: int, cents: int) -> None:
+        self.transaction = transaction
+
+        # Store remaining quantity (in micro-units) & amount (in cents)
+        self.units = units
+        self.cents = cents
+
+
+    @property
+    def quantity(self) -> float:
+        return from_fixed(self.units, quantity_decimals)
+
+
+    @property
+    def amount(self) -> float:
+        return from_fixed(self.cents, amount_decimals)
+
+
+    def __repr__(self) -> str:
+        return 'Lot({!r}, units={!r}, cents={!r})'.format(self.transaction, self.units, self.cents)
+
+
+    def to_dict(self) -> dict:
+        '''Converts lot to dictionary with German labels'''
+
+        data = self.transaction.to_dict()
+
+        # Use remaining quantity & amount
+        data[field_labels['quantity']] = self.quantity
+        data[field_labels['amount']] = self.amount
+
+        return data
+
+
+def as_dict(item) -> dict:
+    '''Converts record to dictionary (if not already)'''
+
+    if isinstance(item, dict):
+        return item
+
+    return item.to_dict()
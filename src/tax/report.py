@@ -1,16 +1,23 @@
 import os
-from datetime import datetime
-from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from operator import attrgetter, itemgetter
 
 import click
-import pandas as pd
 
-from .assets.fiat import Fiat
-from .assets.metal import Metal
-from .assets.crypto import Crypto
-from .assets.stocks import Stocks
-
-from .pdf import Document
+from .assets import classes, instances
+
+from . import section_types
+from .export import export_data
+from .fixed import amount_decimals, format_fixed, from_fixed, to_cents
+from .ledger import Ledger, load_checkpoint, save_checkpoint
+from .prices import load_store
+from .readers import get_engine, read_csv, read_files
+from .records import Transaction, to_number
+from .store import compare_holdings, connect, store_transactions
+from .valuation import get_class_values, get_observed_prices, get_time_series, read_prices
+from ..logs import logger, summarize
 from ..utils import slugify
 
 
@@ -19,23 +26,10 @@ from ..utils import slugify
 today = datetime.today()
 
 # (2) .. sort order 'by date'
-by_date = itemgetter('Datum')
-
-# (3) .. asset classes
-classes = {
-    'Fiat': 'fiat',
-    'Metal': 'metal',
-    'Cryptocurrency': 'crypto',
-    'Stock (derivative)': 'stocks',
-}
+by_date = attrgetter('date')
 
-# (4) .. asset instances
-instances = {
-    'fiat': Fiat(),
-    'metal': Metal(),
-    'crypto': Crypto(),
-    'stocks': Stocks(),
-}
+# (3) .. grouping 'by asset'
+by_asset = attrgetter('asset')
 
 
 class Report:
@@ -43,6 +37,54 @@ class Report:
     verbose = 0
 
 
+    # Define number of processes rendering PDF sections
+    jobs = 1
+
+
+    # Define tax year (limiting report to transactions until its end)
+    year = None
+
+
+    # Define report sections (defaults to all of them)
+    sections = None
+
+
+    # Define normalized records (eg fetched from API, used instead of input files, see `make_record`)
+    records = None
+
+
+    # Define CSV ingestion engine (defaults to `pandas`, if installed)
+    engine = None
+
+
+    # Define cost-basis method (see 'tax/lots.py') ..
+    cost_basis = 'fifo'
+
+
+    # .. & others computed alongside (for comparison)
+    compare = None
+
+
+    # Define checkpoint (resuming previous runs, eg of same account)
+    checkpoint = None
+
+
+    # Define SQLite database storing transactions (& matched sales)
+    store = None
+
+
+    # Define price history valuing holdings (CSV file, defaults to prices observed when trading)
+    price_file = None
+
+
+    # Define price store valuing transfers received without cost basis (see 'tax/prices.py')
+    price_store = None
+
+
+    # Define metrics collected per stage (disabled by default, see 'tax/metrics.py')
+    metrics = None
+
+
     # Define user information
     user_info = {
         'name': 'Max Mustermann',
@@ -85,72 +127,35 @@ class Report:
     ]
 
 
-    def __init__(self, input_file: str) -> None:
-        # Determine number of lines to be skipped
-        # (1) Load data from file
-        with open(input_file, 'r') as file:
-            data = file.readlines()
-
-        # (2) Set default
-        skiprows = 6
-
-        # (3) Loop over lines ..
-        for index, line in enumerate(data):
-            # .. if header line is found ..
-            if 'Transaction ID' in line:
-                # .. store lines to be skipped
-                skiprows = index
-
-                # .. abort loop
-                break
+    def __init__(self, input_file=None) -> None:
+        # Store input file (or list of files, loaded on demand)
+        self.input_file = input_file
 
-        # Load CSV data
-        self.csv_data = pd.read_csv(input_file, skiprows=skiprows).to_dict('records')
-
-        if self.verbose > 1: click.echo('csv_data: {}'.format(csv_data))
+        # Create cache for (lazily) computed data stages
+        self.cache = {}
 
 
     def extract_assets(self) -> tuple:
-        # Create set for each asset class
-        assets = {asset_class: set() for asset_class in instances.keys()}
-
-        # Loop over CSV data
-        for item in self.csv_data:
-            # Take precautions ..
-            if item['Asset class'] not in classes:
-                # .. skipping unknown asset classes
-                continue
+        # Add (new) rows to ledger
+        ledger = self.get('ledger')
+        ledger.add_rows(self.get('new_rows'))
 
-            # Add asset to corresponding listing
-            assets[classes[item['Asset class']]].add(item['Asset'])
+        # Determine assets (per asset class)
+        assets = ledger.get_assets()
 
-        # Sort assets (by name)
-        for asset, asset_set in assets.items():
-            assets[asset] = sorted(list(asset_set))
-
-        if self.verbose > 1:
-            click.echo('assets: {}'.format(assets))
+        logger.debug('assets: %s', summarize(assets), extra={'stage': 'extract_assets'})
 
         # Create data array for net worth
         wealth = {}
 
-        # Determine total of `fiat` paid for assets
-        fiat_paid = 0
-
-        for mode, asset_list in assets.items():
-            # Initialize object
-            obj = instances[mode]
+        for mode, totals in ledger.totals.items():
+            # Store asset amounts
+            wealth[mode] = instances[mode].format_assets(totals)
 
-            # Extract asset quantities & paid amount of `fiat`
-            quantities, paid = obj.extract_assets(self.csv_data, asset_list)
+        # Determine total of `fiat` paid for assets (in cents)
+        fiat_paid = sum(ledger.fiat_paid.values())
 
-            # Store asset quantities
-            wealth[mode] = quantities
-
-            # Add paid amount of `fiat`
-            fiat_paid += paid
-
-        if self.verbose > 1: click.echo('fiat_paid: {}'.format(fiat_paid))
+        logger.debug('fiat_paid: %s', format_fixed(fiat_paid, amount_decimals), extra={'stage': 'extract_assets'})
 
         # Example:
         #
@@ -167,7 +172,7 @@ class Report:
                 continue
 
             # Set default
-            fiat_amount = fiat_paid + float(item['amount'])
+            fiat_amount = fiat_paid + to_cents(item['amount'])
 
             # If negative (even '-0.00') ..
             if not fiat_amount > 0:
@@ -175,15 +180,14 @@ class Report:
                 fiat_amount = 0
 
             # Store formattet `fiat` amount
-            item['amount'] = '{:.2f}'.format(fiat_amount)
+            item['amount'] = format_fixed(fiat_amount, amount_decimals)
 
-        if self.verbose > 1:
-            click.echo('wealth: {}'.format(wealth))
+        logger.debug('wealth: %s', summarize(wealth), extra={'stage': 'extract_assets'})
 
         return (assets, wealth)
 
 
-    def process_transactions(self) -> dict:
+    def process_transactions(self, rows: list) -> dict:
         # Create data array
         transactions = {
             'fiat': {
@@ -204,26 +208,26 @@ class Report:
             },
         }
 
-        for item in self.csv_data:
-            # Determine date & time of transaction
-            date = datetime.strptime(item['Timestamp'][:10], '%Y-%m-%d')
-            time = datetime.strptime(item['Timestamp'][11:19], '%H:%M:%S')
+        # Keep transaction IDs only if needed (see `update_store`), rather than a string per transaction
+        keep_ids = bool(self.store)
 
-            # Format date & time
-            date_string = '{} {}'.format(date.date(), time.time())
+        for item in rows:
+            # Determine date & time of transaction
+            date = datetime.fromisoformat('{} {}'.format(item['Timestamp'][:10], item['Timestamp'][11:19]))
 
             if item['Asset class'] == 'Fiat':
                 # Determine direction & transaction type
                 direction, transaction_type = instances['fiat'].process_transaction(item)
 
                 # Append transaction data accordingly
-                transactions['fiat'][direction].append({
-                    'Datum': date_string,
-                    'Transaktion': transaction_type,
-                    'Betrag': item['Amount Fiat'],
-                    'Asset': item['Fiat'],
-                    'Gebühren': item['Fee'],
-                })
+                transactions['fiat'][direction].append(Transaction(
+                    date,
+                    transaction_type,
+                    item['Fiat'],
+                    to_number(item['Amount Fiat']),
+                    fee=to_number(item['Fee']),
+                    transaction_id=item['Transaction ID'] if keep_ids else None,
+                ))
 
             else:
                 # Determine current mode
@@ -233,15 +237,16 @@ class Report:
                 direction, transaction_type = instances[mode].process_transaction(item)
 
                 # Append transaction data accordingly
-                transactions[mode][direction].append({
-                    'Datum': date_string,
-                    'Transaktion': transaction_type,
-                    'Betrag': item['Amount Fiat'],
-                    'Asset Menge': item['Amount Asset'],
-                    'Asset Preis': item['Asset market price'],
-                    'Asset': item['Asset'],
-                    'Gebühren': item['Fee'],
-                })
+                transactions[mode][direction].append(Transaction(
+                    date,
+                    transaction_type,
+                    item['Asset'],
+                    to_number(item['Amount Fiat']),
+                    to_number(item['Amount Asset']),
+                    to_number(item['Asset market price']),
+                    to_number(item['Fee']),
+                    item['Transaction ID'] if keep_ids else None,
+                ))
 
         # Process transactions
         for mode, transaction_data in transactions.items():
@@ -253,264 +258,421 @@ class Report:
             # (2) Build extra column, combining incoming/outgoing transactions per asset
             transactions[mode]['all'] = sorted(transactions[mode]['in'] + transactions[mode]['out'], key=by_date)
 
-        if self.verbose > 1:
-            click.echo('transactions: {}'.format(transactions))
+        logger.debug('transactions: %s', summarize(transactions), extra={'stage': 'process_transactions'})
 
         return transactions
 
 
     def calculate_margins(self, assets: dict, transactions: dict) -> tuple:
-        # Create data arrays
-        # (1) Balance
-        balance = {
-            'metal': [],
-            'crypto': [],
-            'stocks': [],
-        }
+        # Add (new) transactions to ledger (keeping matched sales)
+        ledger = self.get('ledger')
 
-        # (2) Taxes
-        taxes = {
-            'metal': [],
-            'crypto': [],
-            'stocks': [],
-        }
+        # Value transfers (if price store is available)
+        prices = load_store(self.price_store) if self.price_store else None
 
-        # (3) Portfolio
-        portfolio = {
-            'metal': [],
-            'crypto': [],
-            'stocks': [],
-        }
+        try:
+            self.cache['sales'] = ledger.add_transactions(transactions, prices)
+
+        finally:
+            if prices is not None:
+                prices.close()
 
-        for mode in balance.keys():
-            # Create data array
-            balance_taxes = []
+        balance, taxes, portfolio = ledger.get_margins(assets)
 
-            for asset in assets[mode]:
-                hint = False
+        logger.debug('balance: %s', summarize(balance), extra={'stage': 'calculate_margins'})
+        logger.debug('taxes: %s', summarize(taxes), extra={'stage': 'calculate_margins'})
+        logger.debug('portfolio: %s', summarize(portfolio), extra={'stage': 'calculate_margins'})
 
-                buffer = {
-                    'in': [],
-                    'out': [],
-                }
+        return (balance, taxes, portfolio)
 
-                # Processing incoming transactions
-                for item in transactions[mode]['in']:
-                    if item['Asset'] != asset:
-                        continue
 
-                    if item['Betrag'] == '-':
-                        item['Betrag'] = 0
+    def get_tax_years(self, taxes: dict) -> set:
+        tax_years = set()
 
-                    if item['Gebühren'] == '-':
-                        item['Gebühren'] = 0
+        for mode in taxes.keys():
+            for item in taxes[mode]:
+                # Skip test entries
+                if item['Verkaufsjahr'] == 1990:
+                    continue
 
-                    if item['Transaktion'] == 'empfangen':
-                        hint = True
+                tax_years.add(item['Verkaufsjahr'])
 
-                    buffer['in'].append({
-                        'Datum': item['Datum'],
-                        'Transaktion': item['Transaktion'],
-                        'Betrag': '{:.2f}'.format(float(item['Betrag'])),
-                        'Asset Menge': '{:.6f}'.format(float(item['Asset Menge'])),
-                        'Asset Preis': '{:.2f}'.format(float(item['Asset Preis'])),
-                        'Asset': item['Asset'],
-                        'Gebühren': '{:.6f}'.format(float(item['Gebühren'])),
-                    })
+        logger.debug('tax_years: %s', summarize(sorted(tax_years)))
 
-                # Processing outgoing transactions
-                for item in transactions[mode]['out']:
-                    if item['Asset'] != asset:
-                        continue
+        return tax_years
 
-                    if item['Betrag'] == '-':
-                        item['Betrag'] = 0
 
-                    if item['Gebühren'] == '-':
-                        item['Gebühren'] = 0
+    def group_by_asset(self, items: list, key=itemgetter('Asset')) -> dict:
+        # Create data array
+        groups = {}
 
-                    buffer['out'].append({
-                        'Datum': item['Datum'],
-                        'Transaktion': item['Transaktion'],
-                        'Betrag': '{:.2f}'.format(float(item['Betrag'])),
-                        'Asset Menge': '{:.6f}'.format(float(item['Asset Menge'])),
-                        'Asset Preis': '{:.2f}'.format(float(item['Asset Preis'])),
-                        'Asset': item['Asset'],
-                        'Gebühren': '{:.6f}'.format(float(item['Gebühren']))
-                    })
+        for item in items:
+            # Add item to corresponding group
+            groups.setdefault(key(item), []).append(item)
 
-                # Sort buffered transactions
-                for direction, data in buffer.items():
-                    buffer[direction] = sorted(data, key=by_date)
+        return groups
 
-                if self.verbose > 1: click.echo('buffer: {}'.format(buffer))
 
-                assets_balance = 0
-                buffer_balance = 0
+    def get_sections(self) -> list:
+        # Determine requested sections
+        requested = self.sections if self.sections else section_types
 
-                for item in buffer['out']:
-                    asset_balance = 0
+        # Create data array
+        sections = []
 
-                    if item['Asset'] == asset:
-                        days = datetime.strptime(item['Datum'], '%Y-%m-%d %H:%M:%S') - datetime.strptime(buffer['in'][0]['Datum'], '%Y-%m-%d %H:%M:%S')
-                        year = datetime.strptime(item['Datum'], '%Y-%m-%d %H:%M:%S')
+        # Add cover page (portfolio overview, pie charts included)
+        if 'cover' in requested:
+            sections.append(('add_cover_page', (self.get('assets'), self.get('wealth'), self.categories, self.user_info)))
 
-                        if float(item['Asset Menge']) == 0:
-                            item['Asset Menge'] = item['Gebühren']
+        # Add `fiat` transactions pages (one per currency)
+        if 'fiat' in requested:
+            fiat_transactions = self.group_by_asset(self.get('transactions')['fiat']['all'], by_asset)
 
-                        if buffer['in']:
-                            if float(item['Asset Menge']) > float(buffer['in'][0]['Asset Menge']):
-                                while float(item['Asset Menge']) > float(buffer['in'][0]['Asset Menge']):
-                                    if self.verbose > 1: click.echo('1: len(buffer["in"]): {}'.format(len(buffer['in'])))
+            for asset in self.get('assets')['fiat']:
+                sections.append(('add_fiat_pages', ([asset], fiat_transactions.get(asset, []))))
 
-                                    if item['Transaktion'] == 'Verkauf':
-                                        buffer_balance += (float(buffer['in'][0]['Asset Menge']) * float(item['Asset Preis'])) - float(buffer['in'][0]['Betrag'])
+        # Add other transactions pages (one per asset)
+        if 'transactions' in requested:
+            transactions, balance = self.get('transactions'), self.get('balance')
 
-                                    item['Betrag'] = '{:.2f}'.format((float(item['Asset Menge']) - float(buffer['in'][0]['Asset Menge'])) * float(item['Asset Preis']))
-                                    item['Asset Menge'] = '{:.6f}'.format(float(item['Asset Menge']) - float(buffer['in'][0]['Asset Menge']))
+            for mode, asset_list in self.get('assets').items():
+                # Skip `fiat` (which is handled separately)
+                if mode == 'fiat':
+                    continue
 
-                                    if buffer['in']:
-                                        del buffer['in'][0]
+                asset_transactions = self.group_by_asset(transactions[mode]['all'], by_asset)
+                asset_balance = self.group_by_asset(balance[mode])
 
-                                    else:
-                                        buffer['in'][0]['Betrag'] = 0
-                                        buffer['in'][0]['Asset Menge'] = 0
+                for asset in asset_list:
+                    sections.append(('add_transaction_pages', (
+                        {mode: [asset]},
+                        {mode: {'all': asset_transactions.get(asset, [])}},
+                        {mode: asset_balance.get(asset, [])},
+                        self.categories,
+                    )))
 
-                                    if float(item['Asset Menge']) < 0:
-                                        if self.verbose > 1: click.echo('break because of Amount')
-                                        break
+        # Add taxes overview page
+        if 'taxes' in requested:
+            sections.append(('add_taxes_page', (self.tax_guidelines, self.get('taxes'))))
 
-                                    if self.verbose > 1: click.echo('2: len(buffer["in"]): {}'.format(len(buffer['in'])))
+        # Add tax pages (one per year)
+        if 'tax-years' in requested:
+            taxes = self.get('taxes')
 
-                                    if not buffer['in']:
-                                        if self.verbose > 1: click.echo('break because of length')
-                                        break
+            for year in sorted(self.get_tax_years(taxes)):
+                # Skip years other than tax year (if specified)
+                if self.year and year != self.year:
+                    continue
 
-                                asset_balance += buffer_balance
+                sections.append(('add_tax_pages', ([year], taxes, self.get('wealth')['fiat'][0], self.categories)))
 
-                            if buffer['in']:
-                                if float(item['Asset Menge']) == float(buffer['in'][0]['Asset Menge']):
-                                    if item['Transaktion'] == 'Verkauf':
-                                        asset_balance += float(item['Betrag']) - float(buffer['in'][0]['Betrag'])
+        # Add portfolio pages (one per asset class)
+        if 'portfolio' in requested:
+            portfolio = self.get('portfolio')
 
-                                    if buffer['in']:
-                                        del buffer['in'][0]
+            for mode, category in self.categories.items():
+                if mode in portfolio:
+                    sections.append(('add_portfolio_pages', ({mode: portfolio[mode]}, self.get('wealth'), {mode: category})))
 
-                                    else:
-                                        buffer['in'][0]['Betrag'] = 0
-                                        buffer['in'][0]['Asset Menge'] = 0
+        # Add net worth page (chart of daily valuation)
+        if 'net-worth' in requested:
+            series = self.get('valuation')
 
-                                elif float(item['Asset Menge']) < float(buffer['in'][0]['Asset Menge']):
-                                    buffer['in'][0]['Betrag'] = '{:.2f}'.format((float(buffer['in'][0]['Asset Menge']) - float(item['Asset Menge'])) * float(buffer['in'][0]['Asset Preis']))
-                                    buffer['in'][0]['Asset Menge'] = '{:.6f}'.format((float(buffer['in'][0]['Asset Menge']) - float(item['Asset Menge'])))
+            if series is not None:
+                sections.append(('add_net_worth_page', (series['dates'], get_class_values(series), self.categories)))
 
-                                    if item['Transaktion'] == 'Verkauf':
-                                        asset_balance += float(item['Betrag']) - (float(buffer['in'][0]['Asset Preis']) * float(item['Asset Menge']))
+        # If enabled ..
+        if 'donations' in requested and self.donations:
+            # .. add donations page (including QR code images)
+            sections.append(('add_donations_page', (self.donations,)))
 
-                    assets_balance += asset_balance
+        return sections
 
-                    balance_taxes.append({
-                        'Asset': '{}*'.format(asset) if hint else asset,
-                        'HODL': days.days,
-                        'Jahr': year.year,
-                        'winLoss': '{:.2f}'.format(asset_balance),
-                    })
 
-                if buffer['in']:
-                    for item in buffer['in']:
-                        if float(item['Asset Menge']) > 0:
-                            portfolio[mode].append(item)
+    def get(self, stage: str):
+        # If stage was computed before ..
+        if stage in self.cache:
+            # .. reuse it
+            return self.cache[stage]
 
-                balance[mode].append({
-                    'Asset': asset,
-                    'winLoss': '{:.2f}'.format(assets_balance),
-                })
+        # Compute stage (& all stages it depends on)
+        # (1) CSV data (or records, if given)
+        if stage == 'csv_data' and self.records is not None:
+            if self.verbose > 0: click.echo('Loading {} records ..'.format(len(self.records)))
+            self.cache['csv_data'] = self.records
 
-                if assets_balance != 0:
-                    taxes[mode] = (instances[mode].calculate_taxes(asset, balance_taxes))
+        elif stage == 'csv_data':
+            if self.verbose > 0: click.echo('Loading CSV data ({}) ..'.format(get_engine(self.engine)))
+            with self.measure('ingestion', engine=get_engine(self.engine)) as record:
+                if isinstance(self.input_file, str):
+                    self.cache['csv_data'] = read_csv(self.input_file, self.engine)
 
+                # .. merging multiple files (if necessary)
                 else:
-                    taxes[mode].append({
-                        'Asset': asset,
-                        'Verkaufsjahr': 1990,
-                        'Betrag': 0.00,
-                    })
+                    self.cache['csv_data'] = read_files(self.input_file, self.engine)
 
-            # Sort taxes (by date of purchase & asset name)
-            taxes[mode].sort(key=itemgetter('Verkaufsjahr', 'Asset'))
+                record['rows'] = len(self.cache['csv_data'])
 
-        if self.verbose > 1:
-            click.echo('balance: {}'.format(balance))
-            click.echo('taxes: {}'.format(taxes))
-            click.echo('portfolio: {}'.format(portfolio))
+            logger.debug('csv_data: %s', summarize(self.cache['csv_data']), extra={'stage': 'ingestion'})
 
-        return (balance, taxes, portfolio)
+        # (2) CSV data (until end of tax year, if specified)
+        elif stage == 'rows':
+            rows = self.get('csv_data')
 
+            if self.year:
+                # Determine end of tax year
+                year_end = '{}-12-31'.format(self.year)
 
-    def get_tax_years(self, taxes: dict) -> set:
-        tax_years = set()
+                rows = [item for item in rows if item['Timestamp'][:10] <= year_end]
 
-        for mode in taxes.keys():
-            for item in taxes[mode]:
-                # Skip test entries
-                if item['Verkaufsjahr'] == 1990:
-                    continue
+            self.cache['rows'] = rows
 
-                tax_years.add(item['Verkaufsjahr'])
+        # (3) Ledger & rows not processed yet
+        elif stage in ['ledger', 'new_rows']:
+            methods = self.get_methods()
+            ledger, rows = Ledger(methods), self.get('rows')
 
-        if self.verbose > 1:
-            click.echo('tax_years: {}'.format(tax_years))
+            # If enabled (unless limited to tax year) ..
+            if self.checkpoint and not self.year:
+                # .. resume from checkpoint
+                checkpoint = load_checkpoint(self.checkpoint, methods)
+                new_rows = checkpoint.get_new_rows(rows)
 
-        return tax_years
+                if new_rows is None:
+                    if self.verbose > 0: click.echo('Checkpoint "{}" does not match input, starting over ..'.format(self.checkpoint))
 
+                elif checkpoint.last_id is not None:
+                    if self.verbose > 0: click.echo('Resuming from checkpoint "{}" ({} new rows) ..'.format(self.checkpoint, len(new_rows)))
+                    ledger, rows = checkpoint, new_rows
 
-    def render(self, output_file: str, title: str = 'Bitpanda Report'):
-        # Determine available assets
-        if self.verbose > 0: click.echo('Extracting assets ..')
-        assets, wealth = self.extract_assets()
+            self.cache['ledger'], self.cache['new_rows'] = ledger, rows
 
-        # Process transactions
-        if self.verbose > 0: click.echo('Processing transactions ..')
-        transactions = self.process_transactions()
+        # (4) Assets & net worth
+        elif stage in ['assets', 'wealth']:
+            new_rows = self.get('new_rows')
+
+            if self.verbose > 0: click.echo('Extracting assets ..')
+            with self.measure('extract_assets', rows=len(new_rows)):
+                self.cache['assets'], self.cache['wealth'] = self.extract_assets()
+
+        # (5) Transactions
+        elif stage == 'transactions':
+            rows = self.get('rows')
+
+            if self.verbose > 0: click.echo('Processing transactions ..')
+            with self.measure('process_transactions', rows=len(rows)):
+                self.cache['transactions'] = self.process_transactions(rows)
+
+        # (6) Wins & losses, taxes & portfolio (& matched sales)
+        elif stage in ['balance', 'taxes', 'portfolio', 'sales']:
+            assets, new_rows = self.get('assets'), self.get('new_rows')
+
+            # Process only transactions not added to ledger yet
+            # (reusing all transactions if there's no checkpoint)
+            if new_rows is self.get('rows'):
+                transactions = self.get('transactions')
+
+            else:
+                with self.measure('process_transactions', rows=len(new_rows)):
+                    transactions = self.process_transactions(new_rows)
+
+            if self.verbose > 0: click.echo('Calculating wins & losses ..')
+            with self.measure('calculate_margins', rows=sum(len(data['in']) + len(data['out']) for data in transactions.values())):
+                self.cache['balance'], self.cache['taxes'], self.cache['portfolio'] = self.calculate_margins(assets, transactions)
+
+        # (7) Taxable wins & losses (per cost-basis method)
+        elif stage == 'comparison':
+            # Make sure ledger is up-to-date
+            self.get('balance')
+
+            self.cache['comparison'] = self.get('ledger').get_comparison()
+
+        # (8) Daily holdings & their value
+        elif stage == 'valuation':
+            transactions = self.get('transactions')
+
+            # Combine prices observed when trading with price history (if provided, taking precedence on same day)
+            prices = get_observed_prices(transactions)
+
+            if self.price_file:
+                prices += read_prices(self.price_file)
+
+            if self.verbose > 0: click.echo('Valuing holdings ..')
+            with self.measure('valuation', prices=len(prices)) as record:
+                self.cache['valuation'] = get_time_series(transactions, prices, date(self.year, 12, 31) if self.year else None)
+
+                if self.cache['valuation'] is not None:
+                    record['days'] = len(self.cache['valuation']['dates'])
+
+        else:
+            raise Exception('Unknown stage "{}"'.format(stage))
+
+        return self.cache[stage]
+
+
+    def get_methods(self) -> list:
+        # Determine cost-basis methods (reported one first)
+        methods = [self.cost_basis]
+
+        for method in self.compare or []:
+            if method not in methods:
+                methods.append(method)
+
+        return methods
+
+
+    def update_checkpoint(self) -> None:
+        # If disabled (or limited to tax year) ..
+        if not self.checkpoint or self.year:
+            # .. there's nothing to do
+            return
+
+        # Make sure ledger is up-to-date
+        self.get('wealth')
+        self.get('balance')
+
+        if self.verbose > 0: click.echo('Saving checkpoint "{}" ..'.format(self.checkpoint))
+        with self.measure('checkpoint'):
+            save_checkpoint(self.get('ledger'), self.checkpoint)
+
+
+    def update_store(self) -> None:
+        # If disabled ..
+        if not self.store:
+            # .. there's nothing to do
+            return
+
+        transactions, sales = self.get('transactions'), self.get('sales')
+
+        if self.verbose > 0: click.echo('Updating store "{}" ..'.format(self.store))
+        with self.measure('store') as record:
+            connection = connect(self.store)
+
+            try:
+                count = store_transactions(connection, transactions, sales)
+
+                # Make sure stored holdings match ledger
+                mismatches = compare_holdings(connection, self.get_fiat_totals())
 
-        # Calculate invested capital
-        if self.verbose > 0: click.echo('Calculating wins & losses ..')
-        balance, taxes, portfolio = self.calculate_margins(assets, transactions)
+            finally:
+                connection.close()
+
+            record['rows'] = count
+
+        if self.verbose > 0: click.echo('Stored {} new transactions ..'.format(count))
+
+        for item in mismatches:
+            logger.warning('Stored holdings of %s (%s) differ from ledger: %.2f (expected %.2f)', item['asset'], item['asset_class'], item['stored'], item['expected'])
+
+
+    def get_fiat_totals(self) -> dict:
+        '''Determines balance of each currency (before falling back to zero, see `extract_assets`)'''
+
+        # Make sure ledger is up-to-date
+        self.get('wealth')
+
+        ledger = self.get('ledger')
+
+        # Create data array
+        totals = {}
+
+        for asset, cents in ledger.totals['fiat'].items():
+            # Add `fiat` paid for (or received from) assets to €uro balance
+            if asset == 'EUR':
+                cents += sum(ledger.fiat_paid.values())
+
+            totals[('fiat', asset)] = from_fixed(cents, amount_decimals)
+
+        return totals
+
+
+    def measure(self, stage: str, **fields):
+        # If disabled ..
+        if self.metrics is None:
+            # .. skip measuring
+            return nullcontext({})
+
+        return self.metrics.measure(stage, **fields)
+
+
+    def compute(self) -> dict:
+        return {stage: self.get(stage) for stage in ['assets', 'wealth', 'transactions', 'balance', 'taxes', 'portfolio']}
+
+
+    def render(self, output_file: str, title: str = 'Bitpanda Report', file_format: str = 'pdf'):
+        # Store current state & transactions (if enabled)
+        self.update_checkpoint()
+        self.update_store()
+
+        # If other file format than PDF is requested ..
+        if file_format != 'pdf':
+            # .. compute report data
+            data = self.compute()
+
+            # .. export it (skipping charts & PDF generation)
+            if self.verbose > 0: click.echo('Exporting {} report ..'.format(file_format.upper()))
+            with self.measure('export', format=file_format):
+                export_data(data, output_file, file_format, title)
+
+            return
+
+        # Import dependencies
+        from .pdf import Document, render_fragment, merge_fragments
+
+        # Split report into sections (computing only data they require)
+        sections = self.get_sections()
+
+        # If multiple processes are available ..
+        if self.jobs > 1:
+            # .. render sections as separate PDF fragments in parallel
+            if self.verbose > 0: click.echo('Generating PDF report ({} sections, {} processes) ..'.format(len(sections), self.jobs))
+
+            with self.measure('sections', sections=len(sections), jobs=self.jobs):
+                with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                    fragments = list(executor.map(render_fragment, sections))
+
+            # Merge fragments & save PDF report
+            if self.verbose > 0: click.echo('Exporting PDF report ..')
+            with self.measure('export', format=file_format) as record:
+                merge_fragments(fragments, '{}.pdf'.format(output_file), title)
+                record['bytes'] = os.path.getsize('{}.pdf'.format(output_file))
+
+            return
 
         # Set up PDF generation
         if self.verbose > 0: click.echo('Generating PDF report ..')
         pdf = Document()
 
-        # Create cover page (portfolio overview, pie charts included)
-        if self.verbose > 0: click.echo('Creating cover page ..')
-        pdf.add_cover_page(assets, wealth, self.categories, self.user_info)
-
-        # Create `fiat` transactions pages
-        if self.verbose > 0: click.echo('Creating fiat transaction pages ..')
-        pdf.add_fiat_pages(assets['fiat'], transactions['fiat']['all'])
-
-        # Create other transactions page
-        if self.verbose > 0: click.echo('Creating other transaction pages ..')
-        pdf.add_transaction_pages(assets, transactions, balance, self.categories)
+        # Define progress messages
+        messages = {
+            'add_cover_page': 'Creating cover page ..',
+            'add_fiat_pages': 'Creating fiat transaction pages ..',
+            'add_transaction_pages': 'Creating other transaction pages ..',
+            'add_taxes_page': 'Creating taxes page ..',
+            'add_tax_pages': 'Creating tax pages per year ..',
+            'add_portfolio_pages': 'Creating portfolio pages ..',
+            'add_net_worth_page': 'Creating net worth page ..',
+            'add_donations_page': 'Creating donations page ..',
+        }
 
-        # Create taxes overview page
-        if self.verbose > 0: click.echo('Creating taxes page ..')
-        pdf.add_taxes_page(self.tax_guidelines, taxes)
+        # Keep track of current section type
+        current = None
 
-        # Create tax pages for each year
-        if self.verbose > 0: click.echo('Creating tax pages per year ..')
-        pdf.add_tax_pages(self.get_tax_years(taxes), taxes, wealth['fiat'][0], self.categories)
+        for method, args in sections:
+            # Report progress (once per section type)
+            if method != current:
+                if self.verbose > 0: click.echo(messages[method])
 
-        # Create portfolio page
-        if self.verbose > 0: click.echo('Creating portfolio pages ..')
-        pdf.add_portfolio_pages(portfolio, wealth, self.categories)
+                current = method
 
-        # If enabled ..
-        if self.donations:
-            # .. create donations page (including QR code images)
-            if self.verbose > 0: click.echo('Creating donations page ..')
-            pdf.add_donations_page(self.donations)
+            # Create section
+            with self.measure(method) as record:
+                pages = pdf.pdf.page_no()
+                getattr(pdf, method)(*args)
+                record['pages'] = pdf.pdf.page_no() - pages
 
         # Save PDF report
         if self.verbose > 0: click.echo('Exporting PDF report ..')
-        pdf.export('{}.pdf'.format(output_file))
+        with self.measure('export', format=file_format) as record:
+            pdf.export('{}.pdf'.format(output_file))
+            record['bytes'] = os.path.getsize('{}.pdf'.format(output_file))
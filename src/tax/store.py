@@ -0,0 +1,244 @@
+import sqlite3
+
+from .fixed import amount_decimals, from_fixed
+
+
+# Define globally ..
+# (1) .. schema version (bumped whenever triggers change, rebuilding totals per day)
+schema_version = 3
+
+# (2) .. database schema
+schema = '''
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    asset_class TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    type TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    amount REAL NOT NULL,
+    quantity REAL,
+    price REAL,
+    fee REAL
+);
+
+CREATE INDEX IF NOT EXISTS transactions_asset ON transactions (asset_class, asset, timestamp);
+CREATE INDEX IF NOT EXISTS transactions_type ON transactions (type);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id TEXT PRIMARY KEY REFERENCES transactions (id),
+    asset_class TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    win_loss REAL NOT NULL,
+    taxable INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS sales_year ON sales (year, asset_class);
+
+CREATE TABLE IF NOT EXISTS daily (
+    asset_class TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    date TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    fees REAL NOT NULL,
+    transactions INTEGER NOT NULL,
+    PRIMARY KEY (asset_class, asset, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS yearly (
+    year INTEGER NOT NULL,
+    asset_class TEXT NOT NULL,
+    win_loss REAL NOT NULL,
+    taxable REAL NOT NULL,
+    sales INTEGER NOT NULL,
+    PRIMARY KEY (year, asset_class)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS transactions_daily AFTER INSERT ON transactions BEGIN
+    -- Change holdings (net of fees charged in currency or asset itself, see `sum_assets`)
+    INSERT INTO daily VALUES (
+        NEW.asset_class,
+        NEW.asset,
+        substr(NEW.timestamp, 1, 10),
+        CASE NEW.direction WHEN 'in' THEN 1 ELSE -1 END * COALESCE(NEW.quantity, NEW.amount)
+            - CASE WHEN NEW.asset_class = 'fiat' OR NEW.type = 'withdrawal' THEN MAX(COALESCE(NEW.fee, 0), 0) ELSE 0 END,
+        MAX(COALESCE(NEW.fee, 0), 0),
+        1
+    ) ON CONFLICT (asset_class, asset, date) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        fees = fees + excluded.fees,
+        transactions = transactions + excluded.transactions;
+
+    -- Pay for purchases from (& credit sales to) €uro balance
+    INSERT INTO daily SELECT
+        'fiat',
+        'EUR',
+        substr(NEW.timestamp, 1, 10),
+        CASE NEW.type WHEN 'sell' THEN NEW.amount ELSE -NEW.amount END,
+        0,
+        0
+    WHERE NEW.asset_class != 'fiat' AND NEW.type IN ('buy', 'sell')
+    ON CONFLICT (asset_class, asset, date) DO UPDATE SET
+        quantity = quantity + excluded.quantity;
+END;
+
+CREATE TRIGGER IF NOT EXISTS sales_yearly AFTER INSERT ON sales BEGIN
+    -- Sum up wins & losses of all matched outgoing transactions (same as ledger), counting actual sales only
+    INSERT INTO yearly VALUES (
+        NEW.year,
+        NEW.asset_class,
+        NEW.win_loss,
+        CASE WHEN NEW.taxable THEN NEW.win_loss ELSE 0 END,
+        COALESCE((SELECT type = 'sell' FROM transactions WHERE id = NEW.id), 1)
+    ) ON CONFLICT (year, asset_class) DO UPDATE SET
+        win_loss = win_loss + excluded.win_loss,
+        taxable = taxable + excluded.taxable,
+        sales = sales + excluded.sales;
+END;
+'''
+
+# (2) .. aggregations (by name), using totals per day & year (kept up-to-date by triggers)
+queries = {
+    # Realized wins & losses (per year & asset class)
+    'pnl': '''
+        SELECT year, asset_class, ROUND(win_loss, 2) AS win_loss, ROUND(taxable, 2) AS taxable, sales
+        FROM yearly
+        WHERE (:asset_class IS NULL OR asset_class = :asset_class)
+        ORDER BY year, asset_class
+    ''',
+
+    # Fees (per asset)
+    'fees': '''
+        SELECT asset_class, asset, ROUND(SUM(fees), 8) AS fees, SUM(transactions) AS transactions
+        FROM daily
+        WHERE (:asset_class IS NULL OR asset_class = :asset_class)
+        GROUP BY asset_class, asset
+        HAVING SUM(fees) > 0
+        ORDER BY asset_class, asset
+    ''',
+
+    # Holdings (per asset, as of given date)
+    'holdings': '''
+        SELECT asset_class, asset, ROUND(SUM(quantity), 8) AS quantity
+        FROM daily
+        WHERE date <= :date AND (:asset_class IS NULL OR asset_class = :asset_class)
+        GROUP BY asset_class, asset
+        HAVING ROUND(SUM(quantity), 8) != 0
+        ORDER BY asset_class, asset
+    ''',
+}
+
+
+def connect(database: str) -> sqlite3.Connection:
+    '''Opens transaction store (creating tables & indexes, if necessary)'''
+
+    connection = sqlite3.connect(database)
+    connection.row_factory = sqlite3.Row
+
+    # If created by previous version ..
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+
+    if version < schema_version:
+        # .. replace its triggers
+        connection.executescript('DROP TRIGGER IF EXISTS transactions_daily; DROP TRIGGER IF EXISTS sales_yearly;')
+
+    connection.executescript(schema)
+
+    if version < schema_version:
+        rebuild_totals(connection)
+
+    return connection
+
+
+def rebuild_totals(connection: sqlite3.Connection) -> None:
+    '''Recomputes totals per day & year (by inserting stored rows again, firing current triggers)'''
+
+    connection.executescript('''
+        BEGIN;
+
+        DELETE FROM daily;
+        DELETE FROM yearly;
+
+        CREATE TEMP TABLE previous_transactions AS SELECT * FROM transactions;
+        CREATE TEMP TABLE previous_sales AS SELECT * FROM sales;
+
+        DELETE FROM sales;
+        DELETE FROM transactions;
+
+        INSERT INTO transactions SELECT * FROM previous_transactions ORDER BY timestamp;
+        INSERT INTO sales SELECT * FROM previous_sales;
+
+        DROP TABLE previous_transactions;
+        DROP TABLE previous_sales;
+
+        PRAGMA user_version = {};
+
+        COMMIT;
+    '''.format(schema_version))
+
+
+def store_transactions(connection: sqlite3.Connection, transactions: dict, sales: list = None) -> int:
+    '''Stores transactions & matched outgoing ones, eg sales & withdrawals (skipping those stored before), returning number of new transactions'''
+
+    # Count inserted rows (not counting changes made by triggers)
+    new_transactions = 0
+
+    with connection:
+        for mode, transaction_data in transactions.items():
+            for direction in ['in', 'out']:
+                cursor = connection.executemany('INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(
+                    item.transaction_id,
+                    str(item.date),
+                    mode,
+                    item.asset,
+                    item.kind,
+                    direction,
+                    item.amount,
+                    item.quantity,
+                    item.price,
+                    item.fee,
+                ) for item in transaction_data[direction]])
+
+                new_transactions += max(cursor.rowcount, 0)
+
+        connection.executemany('INSERT OR IGNORE INTO sales VALUES (?, ?, ?, ?, ?, ?, ?)', [(
+            item.transaction_id,
+            mode,
+            item.asset,
+            item.date.year,
+            days,
+            from_fixed(win_loss, amount_decimals),
+            int(taxable),
+        ) for mode, item, days, win_loss, taxable in sales or []])
+
+    return new_transactions
+
+
+def compare_holdings(connection: sqlite3.Connection, expected: dict) -> list:
+    '''Compares stored holdings (as of today) with expected ones (eg ledger totals, keyed by asset class & asset), returning mismatches'''
+
+    rows = query(connection, 'holdings', date='9999-12-31')
+    stored = {(row['asset_class'], row['asset']): row['quantity'] for row in rows}
+
+    # Create data array
+    mismatches = []
+
+    for key, value in expected.items():
+        # Compare (ignoring rounding errors of summed up floats)
+        if round(stored.get(key, 0) - value, 6) != 0:
+            mismatches.append({'asset_class': key[0], 'asset': key[1], 'stored': stored.get(key, 0), 'expected': value})
+
+    return mismatches
+
+
+def query(connection: sqlite3.Connection, name: str, asset_class: str = None, date: str = None) -> list:
+    '''Runs aggregation (by name), returning list of dictionaries'''
+
+    if name not in queries:
+        raise Exception('Unknown query "{}"'.format(name))
+
+    cursor = connection.execute(queries[name], {'asset_class': asset_class, 'date': date})
+
+    return [dict(row) for row in cursor]
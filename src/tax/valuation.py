@@ -0,0 +1,176 @@
+from datetime import date
+
+from .fixed import amount_decimals, quantity_decimals, scales
+from .prices import read_price_rows
+
+
+# Define globally ..
+# (1) .. asset classes holding assets (rather than currencies)
+asset_classes = ['metal', 'crypto', 'stocks']
+
+# (2) .. currency used for valuation
+currency = 'EUR'
+
+# (3) .. ordinal of first day in `numpy` dates
+epoch = date(1970, 1, 1).toordinal()
+
+
+def read_prices(price_file: str) -> list:
+    '''Loads price history (CSV file with 'Date', 'Asset' & 'Price' columns, prices in €uro)'''
+
+    return [(moment.date(), asset, price) for moment, asset, price in read_price_rows(price_file)]
+
+
+def get_observed_prices(transactions: dict) -> list:
+    '''Extracts market prices (as observed when trading) from transactions, keyed by asset class & asset'''
+
+    return [(item.date.date(), (mode, item.asset), item.price) for mode in asset_classes for item in transactions[mode]['all'] if item.price]
+
+
+def forward_fill(matrix):
+    '''Replaces missing values (NaN) with last available value (per column), zero before first one'''
+
+    # Import dependency
+    import numpy as np
+
+    rows = np.arange(matrix.shape[0])[:, None]
+
+    # Determine row of last available value (per cell)
+    index = np.where(np.isnan(matrix), 0, rows)
+    np.maximum.accumulate(index, axis=0, out=index)
+
+    return np.nan_to_num(matrix[index, np.arange(matrix.shape[1])], nan=0.0)
+
+
+def get_time_series(transactions: dict, prices: list = None, end: date = None) -> dict:
+    '''Computes daily holdings (per asset), valued against price history (defaulting to prices observed when trading)'''
+
+    # Import dependency
+    import numpy as np
+
+    if prices is None:
+        prices = get_observed_prices(transactions)
+
+    # Collect changes of holdings (one per transaction) ..
+    # (1) .. asset quantities (in micro-units)
+    days, assets, deltas = [], [], []
+
+    # (2) .. & €uro balance (in cents)
+    cash_days, cash_deltas = [], []
+
+    for mode in asset_classes:
+        for direction, sign in [('in', 1), ('out', -1)]:
+            items = transactions[mode][direction]
+
+            # Convert attributes to arrays (one pass each)
+            dates = np.fromiter((item.date.toordinal() for item in items), np.int64, len(items))
+            quantities = np.fromiter((item.quantity or 0.0 for item in items), np.float64, len(items))
+            amounts = np.fromiter((item.amount or 0.0 for item in items), np.float64, len(items))
+
+            # Withdrawals are charged fees (in asset itself) ..
+            fees = np.fromiter((item.fee if item.kind == 'withdrawal' and item.fee else 0.0 for item in items), np.float64, len(items))
+
+            # .. whereas purchases & sales are paid from (or credited to) €uro balance
+            trades = np.fromiter((item.kind in ['buy', 'sell'] for item in items), bool, len(items))
+
+            days.append(dates)
+            assets.extend((mode, item.asset) for item in items)
+            deltas.append(sign * np.rint((quantities + fees) * scales[quantity_decimals]).astype(np.int64))
+
+            cash_days.append(dates[trades])
+            cash_deltas.append(-sign * np.rint(amounts[trades] * scales[amount_decimals]).astype(np.int64))
+
+    for direction, sign in [('in', 1), ('out', -1)]:
+        items = [item for item in transactions['fiat'][direction] if item.asset == currency]
+
+        amounts = np.fromiter((item.amount - (item.fee if item.fee and item.fee > 0 else 0) for item in items), np.float64, len(items))
+
+        cash_days.append(np.fromiter((item.date.toordinal() for item in items), np.int64, len(items)))
+        cash_deltas.append(sign * np.rint(amounts * scales[amount_decimals]).astype(np.int64))
+
+    days, deltas = np.concatenate(days), np.concatenate(deltas)
+    cash_days, cash_deltas = np.concatenate(cash_days), np.concatenate(cash_deltas)
+
+    # Determine period (from first transaction until end date or last price)
+    ordinals = np.concatenate([days, cash_days])
+
+    if not len(ordinals) or (end and end.toordinal() < ordinals.min()):
+        return None
+
+    start = int(ordinals.min())
+    stop = end.toordinal() if end else max(int(ordinals.max()), max((day.toordinal() for day, _, _ in prices), default=0))
+
+    count = stop - start + 1
+
+    # Index assets (in order of asset class & name)
+    asset_list = sorted(set(assets), key=lambda key: (asset_classes.index(key[0]), key[1]))
+    columns = {key: index for index, key in enumerate(asset_list)}
+
+    # Sum up changes per day (skipping those after end date) ..
+    holdings = np.zeros((count, len(asset_list)), dtype=np.int64)
+    cash = np.zeros(count, dtype=np.int64)
+
+    rows = days - start
+    valid = rows < count
+    np.add.at(holdings, (rows[valid], np.fromiter((columns[key] for key in assets), np.int64, len(assets))[valid]), deltas[valid])
+
+    rows = cash_days - start
+    valid = rows < count
+    np.add.at(cash, rows[valid], cash_deltas[valid])
+
+    # .. & accumulate them (giving holdings at end of each day)
+    np.cumsum(holdings, axis=0, out=holdings)
+    np.cumsum(cash, out=cash)
+
+    # Place prices (of known assets, within period, later ones overwriting earlier ones of same day) ..
+    price_matrix = np.full((count, len(asset_list)), np.nan)
+
+    # Map prices to columns, being keyed by either ..
+    # (1) .. asset class & asset (eg observed ones)
+    # (2) .. asset only (eg from price history, applying to every asset class holding asset of that name)
+    names = {key: [index] for key, index in columns.items()}
+
+    for (_, asset), index in columns.items():
+        names.setdefault(asset, []).append(index)
+
+    entries = [(day.toordinal(), index, price) for day, asset, price in prices for index in names.get(asset, [])]
+
+    if entries:
+        rows = np.array([day for day, _, _ in entries], dtype=np.int64) - start
+        cols = np.array([index for _, index, _ in entries], dtype=np.int64)
+        values = np.array([price for _, _, price in entries], dtype=np.float64)
+
+        valid = (rows >= 0) & (rows < count)
+        order = np.argsort(rows[valid], kind='stable')
+        price_matrix[rows[valid][order], cols[valid][order]] = values[valid][order]
+
+    # .. & carry them forward (until next known price)
+    price_matrix = forward_fill(price_matrix)
+
+    # Value holdings
+    values = holdings / scales[quantity_decimals] * price_matrix
+
+    return {
+        'dates': np.arange(start - epoch, stop - epoch + 1).astype('datetime64[D]'),
+        'assets': asset_list,
+        'holdings': holdings,
+        'prices': price_matrix,
+        'values': values,
+        'cash': cash / scales[amount_decimals],
+        'net_worth': values.sum(axis=1) + np.maximum(cash, 0) / scales[amount_decimals],
+    }
+
+
+def get_class_values(series: dict) -> dict:
+    '''Sums up values per asset class (plus €uro balance)'''
+
+    # Import dependency
+    import numpy as np
+
+    modes = np.array([mode for mode, _ in series['assets']])
+    values = {'fiat': np.maximum(series['cash'], 0)}
+
+    for mode in asset_classes:
+        values[mode] = series['values'][:, modes == mode].sum(axis=1) if len(modes) else np.zeros(len(series['dates']))
+
+    return values
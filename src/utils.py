@@ -1,9 +1,8 @@
 import io
 import os
+import sys
 import json
 
-import yaml
-
 
 # Creates directory recursively
 def create_path(path) -> bool:
@@ -28,6 +27,9 @@ def create_path(path) -> bool:
 
 # Loads YAML data
 def load_yaml(file: io.BufferedReader) -> dict:
+    # Import dependency
+    import yaml
+
     try:
         return yaml.safe_load(file)
 
@@ -37,10 +39,6 @@ def load_yaml(file: io.BufferedReader) -> dict:
     return {}
 
 
-def pretty_print(data) -> None:
-    print(yaml.dump(data, allow_unicode=True, default_flow_style=False))
-
-
 # Quick & dirty slugs
 def slugify(string: str) -> str:
     # Convert to lowercase
@@ -60,9 +58,73 @@ def slugify(string: str) -> str:
     return string.replace(' ', '-')
 
 
-def dump_json(data: dict, json_file: str) -> None:
-    '''Stores data as given JSON file'''
+def get_encoder():
+    '''Determines fastest JSON encoder available (`orjson`, if installed), encoding compact UTF-8 bytes'''
+
+    try:
+        # Import dependency
+        import orjson
+
+        return lambda data: orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+    except ImportError:
+        pass
+
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+    return lambda data: encoder.encode(data).encode('utf-8')
+
+
+def open_output(output_file: str):
+    '''Opens binary output (standard output, if given as '-')'''
+
+    if output_file == '-':
+        return io.BufferedWriter(io.FileIO(sys.stdout.fileno(), 'wb', closefd=False))
+
+    return open(output_file, 'wb')
+
+
+def dump_json(data: dict, json_file: str, indent: int = None) -> None:
+    '''Stores data as given JSON file (compact, unless indented)'''
+
+    with open_output(json_file) as file:
+        # Encode at once (using fastest encoder) ..
+        if indent is None:
+            file.write(get_encoder()(data))
+
+        # .. or in chunks (as indenting is for humans anyway)
+        else:
+            for chunk in json.JSONEncoder(ensure_ascii=False, indent=indent, default=str).iterencode(data):
+                file.write(chunk.encode('utf-8'))
+
+
+class JsonLinesWriter:
+    '''Writes records as they arrive, one JSON object per line (NDJSON), flushing each batch'''
+
+    def __init__(self, output_file: str) -> None:
+        self.encode = get_encoder()
+        self.file = open_output(output_file)
+
+        # Count written records
+        self.count = 0
+
+
+    def write(self, records: list) -> None:
+        self.file.write(b''.join(self.encode(record) + b'\n' for record in records))
+
+        # Pass batch on (eg to downstream consumers)
+        self.file.flush()
+
+        self.count += len(records)
+
+
+    def close(self) -> None:
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
 
-    # Write data to JSON file
-    with open(json_file, 'w') as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    def __exit__(self, *args) -> None:
+        self.close()